@@ -34,6 +34,8 @@ CREATE TABLE chatbot_sessions (
     client_token VARCHAR(100),
     started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     ended_at TIMESTAMP NULL,
+    INDEX idx_chatbot_sessions_user (user_id, started_at),
+    INDEX idx_chatbot_sessions_client (client_token, started_at),
     FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 -- CHATBOT MESSAGES
@@ -55,6 +57,8 @@ CREATE TABLE home_sessions (
     client_token VARCHAR(100),
     title VARCHAR(200),
     started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_home_sessions_user (user_id, started_at),
+    INDEX idx_home_sessions_client (client_token, started_at),
     FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 
@@ -66,30 +70,43 @@ CREATE TABLE home_messages (
     input_text TEXT,
     translated_text TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_home_messages_session (home_session_id, created_at),
     FOREIGN KEY (home_session_id) REFERENCES home_sessions(home_session_id)
 );
 
 -- TTS SESSIONS
 CREATE TABLE tts_sessions (
     tts_id INT AUTO_INCREMENT PRIMARY KEY,
-    user_id INT NOT NULL,
+    user_id INT NULL,
+    client_token VARCHAR(255) NULL,
     input_text TEXT,
+    input_hash CHAR(64),        -- sha256 of normalized input_text (backend/text_keys.py)
     language_id INT,
     voice VARCHAR(50),
     audio_path VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_tts_lookup (input_hash, language_id, voice),
+    INDEX idx_tts_user (user_id, created_at),
+    INDEX idx_tts_client (client_token, created_at),
+    INDEX idx_tts_created (created_at),
     FOREIGN KEY (user_id) REFERENCES users(user_id),
     FOREIGN KEY (language_id) REFERENCES languages(language_id)
 );
 -- TRANSLATION SESSIONS
 CREATE TABLE translation_sessions (
     translation_id INT AUTO_INCREMENT PRIMARY KEY,
-    user_id INT NOT NULL,
+    user_id INT NULL,
+    client_token VARCHAR(255) NULL,
     input_text TEXT,
+    input_hash CHAR(64),        -- sha256 of normalized input_text (backend/text_keys.py)
     output_text TEXT,
     source_language_id INT,
     target_language_id INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_translation_lookup (input_hash, source_language_id, target_language_id),
+    INDEX idx_translation_user (user_id, created_at),
+    INDEX idx_translation_client (client_token, created_at),
+    INDEX idx_translation_created (created_at),
     FOREIGN KEY (user_id) REFERENCES users(user_id),
     FOREIGN KEY (source_language_id) REFERENCES languages(language_id),
     FOREIGN KEY (target_language_id) REFERENCES languages(language_id)
@@ -1,129 +1,316 @@
 import os
-import pickle
-import cv2
-import mediapipe as mp
-import numpy as np
 import time
-from deep_translator import GoogleTranslator
 import mysql.connector
-from flask import Flask, jsonify, request, Response
-from gtts import gTTS
+from flask import Flask, jsonify, request, Response, g, has_request_context, send_file, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import random
 import hashlib
+import hmac
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, wait, TimeoutError as FuturesTimeout
+
+from video_stream import FrameHub, CaptureWorker, FrameScheduler, JpegEncoder
+from frame_sources import open_source, parse_source
+from pipeline import RecognitionPipeline, FrameResult, StageTimer, mp_hands
+from metrics import Registry, TimedConnection, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from db_pool import ConnectionPool
+from text_keys import text_hash, same_text, normalize_text
+from ttl_cache import TTLCache, RefreshingMap
+from translators import get_translator, SingleFlight
+from tts_jobs import TTSJobQueue, get_engine
+from audio_store import AudioStore
+from pagination import PageRequest, fetch_page
+from history_export import iter_records, ndjson_lines, csv_lines, SESSION_KINDS, FLAT_KINDS
+from message_writer import MESSAGE_TABLES, WriteBehindBuffer, insert_messages, message_row
+from inference import BatchedPredictor
+from gesture import GestureSessions, RECOGNITION_ROOM
+from model_store import ModelHolder, InvalidVersion
+from roi import ROITracker
+from landmark_stream import LandmarkSubscribers, pack_landmark_frame, LANDMARK_ROOM
 
 # 1. INITIALIZE APP (Must be before routes)
 app = Flask(__name__)
 # Enable CORS to allow requests from your React Frontend
-CORS(app) 
+# Pagination headers must be exposed for the browser to read them cross-origin
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Total-Count', 'X-Home-Next-Cursor', 'X-Home-Total-Count',
+                          'X-Chatbot-Next-Cursor', 'X-Chatbot-Total-Count'])
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# --- METRICS (served as Prometheus text by /api/metrics) ---
+metrics = Registry()
+FRAME_STAGE_SECONDS = metrics.histogram(
+    'gestvox_frame_stage_seconds', 'Time per frame pipeline stage', ('stage',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25))
+LETTERS_CONFIRMED = metrics.counter('gestvox_letters_confirmed', 'Debounced letters emitted to clients')
+REQUEST_SECONDS = metrics.histogram('gestvox_http_request_seconds', 'Request latency by route', ('method', 'route'))
+REQUESTS = metrics.counter('gestvox_http_requests', 'Requests by route and status', ('method', 'route', 'status'))
+DB_CONNECT_SECONDS = metrics.histogram('gestvox_db_connect_seconds', 'Time to open a new MySQL connection')
+DB_CHECKOUT_SECONDS = metrics.histogram('gestvox_db_checkout_seconds', 'Time to borrow a connection from the pool')
+DB_QUERY_SECONDS = metrics.histogram('gestvox_db_query_seconds', 'MySQL statement time', ('statement',))
+CACHE_LOOKUPS = metrics.counter('gestvox_cache_lookups', 'Translation/TTS cache lookups', ('cache', 'tier', 'result'))
+
+# Per-stage frame timings go straight into the histogram; no samples are kept
+stage_timer = StageTimer(keep_samples=False, on_record=lambda stage, seconds: FRAME_STAGE_SECONDS.observe(seconds, stage=stage))
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route)
+        REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    return response
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, 'model.p')
-
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+
+# All streams share one micro-batching front end to the classifier
+predictor = BatchedPredictor(
+    None,
+    max_batch_size=int(os.environ.get('INFERENCE_MAX_BATCH', 32)),
+    max_wait_ms=float(os.environ.get('INFERENCE_MAX_WAIT_MS', 3)),
+)
+
+def _use_model(served):
+    # One reference assignment: the predictor's next batch uses the new model
+    predictor.model = served
+    # Landmark clients map class indices to text themselves; resend the map
+    # so a reload with different classes doesn't leave them with stale labels
+    socketio.emit('landmark_labels', {str(k): v for k, v in served.labels.items()}, to=LANDMARK_ROOM)
+
+# Versioned artifacts from models/ (see model_store.py), falling back to the
+# legacy model.p. FAST_FOREST=1 evaluates forests from flat NumPy arrays
+# instead of sklearn's predict path (same outputs, see bench_forest.py).
+model_holder = ModelHolder(
+    MODELS_DIR,
+    legacy_path=MODEL_PATH,
+    fast_forest=os.environ.get('FAST_FOREST', '0') == '1',
+    on_swap=_use_model,
+)
 try:
-    model_dict = pickle.load(open(MODEL_PATH, 'rb'))
-    model = model_dict['model']
-except FileNotFoundError:
-    print("Warning: model.p not found. Real-time vision will not work.")
-    model = None
-
+    if model_holder.load_initial() is None:
+        print("Warning: no model found in models/ or model.p. Real-time vision will not work.")
+except Exception as e:
+    print(f"Warning: could not load model ({e}). Real-time vision will not work.")
+# MODEL_WATCH_INTERVAL > 0 reloads automatically when models/CURRENT changes
+model_holder.watch(float(os.environ.get('MODEL_WATCH_INTERVAL', 0)), app.logger)
 
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
 hands = mp_hands.Hands(static_image_mode=False, min_detection_confidence=0.5, max_num_hands=1)
 
-labels_dict = {0: 'A', 1: 'B', 2: 'C', 3: 'D', 4: 'E', 5: 'F', 6: 'G', 7: 'H', 8: 'I',
-               9: 'J', 10: 'K', 11: 'L', 12: 'M', 13: 'N', 14: 'O', 15: 'P', 16: 'Q', 17: 'R',
-               18: 'S', 19: 'T', 20: 'U', 21: 'V', 22: 'W', 23: 'SPACE', 24: 'DELETE'}
-
-# Logic Variables
-gesture_state = {
-    "current_sentence": "",
-    "last_predicted_char": "",
-    "prediction_counter": 0,
-    "last_add_time": 0
+# A letter is confirmed once held for CONFIRMATION_SECONDS (about the 15
+# frames at 30 fps the counter used to require), whatever the inference rate
+CONFIRMATION_SECONDS = float(os.environ.get('CONFIRMATION_SECONDS', 0.5))
+COOLDOWN_TIME = 1.0
+
+# Clients that asked for recognized letters, and the camera stream's
+# letter debouncer. Merely connecting a socket doesn't open the camera.
+gesture_sessions = GestureSessions(CONFIRMATION_SECONDS, COOLDOWN_TIME)
+
+@socketio.on('subscribe_recognition')
+def on_subscribe_recognition():
+    join_room(RECOGNITION_ROOM)
+    gesture_sessions.add(request.sid)
+    # Letters keep coming even if this client never opens /api/video_feed
+    capture_worker.ensure_running()
+
+@socketio.on('unsubscribe_recognition')
+def on_unsubscribe_recognition():
+    leave_room(RECOGNITION_ROOM)
+    gesture_sessions.remove(request.sid)
+
+@socketio.on('disconnect')
+def on_disconnect():
+    gesture_sessions.remove(request.sid)
+    landmark_subscribers.discard(request.sid)
+
+# Landmark-only streaming: instead of the server-rendered MJPEG feed, the
+# client gets a compact binary 'landmarks' event per inference frame
+# (see landmark_stream.py for the layout) and draws its own overlay.
+landmark_subscribers = LandmarkSubscribers()
+
+@socketio.on('subscribe_landmarks')
+def on_subscribe_landmarks():
+    join_room(LANDMARK_ROOM)
+    landmark_subscribers.add(request.sid)
+    capture_worker.ensure_running()
+    emit('landmark_labels', {str(k): v for k, v in model_holder.labels.items()})
+
+@socketio.on('unsubscribe_landmarks')
+def on_unsubscribe_landmarks():
+    leave_room(LANDMARK_ROOM)
+    landmark_subscribers.discard(request.sid)
+
+# Result of the most recent inference frame, redrawn on the frames in
+# between so the stream doesn't flicker when the scheduler skips inference
+last_result = FrameResult()
+
+def process_frame(frame, run_inference=True, render=True):
+    """Run hand detection + classification on one camera frame.
+
+    Returns the annotated frame and the predicted character (or None).
+    When `run_inference` is False (the scheduler is skipping this frame) the
+    previous overlay is redrawn instead and no letters are counted. When
+    `render` is False nobody watches the MJPEG feed and nothing is drawn.
+    Called only from the shared capture worker, so MediaPipe is never
+    touched by two threads at once.
+    """
+    global last_result
+    if not run_inference:
+        if render:
+            recognition.draw(frame, last_result)
+        return frame, last_result.text
+
+    result = recognition.process(frame, classify=predictor.model is not None)
+    prediction = None
+    if result.text is not None:
+        # The served model's classes are already the display text
+        prediction = model_holder.current.label_ids.get(result.text)
+
+        # Debouncing: one debouncer for the camera stream; a confirmed
+        # letter is broadcast once to the recognition subscribers. Two
+        # inference periods without a prediction count as the hand leaving.
+        letter = gesture_sessions.update(result.text, max_gap=2 * frame_scheduler.inference_period)
+        if letter:
+            socketio.emit('new_letter', {'letter': letter}, to=RECOGNITION_ROOM)
+            LETTERS_CONFIRMED.inc()
+
+    if len(landmark_subscribers):
+        # Landmark-only clients draw the overlay on their own camera preview
+        payload = pack_landmark_frame(landmark_subscribers.next_seq(), result.points, prediction, result.confidence)
+        socketio.emit('landmarks', payload, to=LANDMARK_ROOM)
+
+    last_result = result
+    if render:
+        recognition.draw(frame, result)
+    return frame, result.text
+
+# Optional region-of-interest tracking: once a hand is found, later frames
+# are cropped around it and downscaled before MediaPipe (ROI_TRACKING=1)
+roi_tracker = ROITracker(
+    enabled=os.environ.get('ROI_TRACKING', '0') == '1',
+    margin=float(os.environ.get('ROI_MARGIN', 0.3)),
+    max_side=int(os.environ.get('ROI_MAX_SIDE', 256)),
+)
+
+# Detection + classification stages (see pipeline.py, shared with bench_pipeline.py)
+recognition = RecognitionPipeline(hands, predictor.predict, roi_tracker, timer=stage_timer)
+
+def reset_tracking():
+    global last_result
+    recognition.reset()
+    last_result = FrameResult()
+
+# One camera + MediaPipe pipeline shared by every /api/video_feed viewer.
+# STREAM_TARGET_FPS caps the output rate; INFERENCE_FPS sets how often
+# MediaPipe runs (the scheduler lowers it further when frames run over budget).
+frame_scheduler = FrameScheduler(
+    target_fps=float(os.environ.get('STREAM_TARGET_FPS', 30)),
+    inference_fps=float(os.environ.get('INFERENCE_FPS', 30)),
+    camera_fps=float(os.environ.get('CAMERA_FPS', 30)),
+    max_interval=int(os.environ.get('INFERENCE_MAX_SKIP', 6)),
+)
+frame_hub = FrameHub()
+capture_options = {
+    'width': os.environ.get('CAMERA_WIDTH'),
+    'height': os.environ.get('CAMERA_HEIGHT'),
+    'fourcc': os.environ.get('CAMERA_FOURCC'),
+    'buffer_size': os.environ.get('CAMERA_BUFFER_SIZE'),
+    'fps': os.environ.get('CAMERA_FPS'),
 }
+# FRAME_SOURCE replays a recording instead of the webcam, e.g.
+# FRAME_SOURCE=video:session.mp4 (looped at its own frame rate) or images:./data
+FRAME_SOURCE = os.environ.get('FRAME_SOURCE')
+if FRAME_SOURCE and parse_source(FRAME_SOURCE)[0] == 'trace':
+    # Traces carry landmarks but no images; replay them with bench_pipeline.py
+    raise ValueError(f'FRAME_SOURCE={FRAME_SOURCE!r}: landmark traces cannot feed the video stream')
+capture_worker = CaptureWorker(
+    process_frame, frame_hub, scheduler=frame_scheduler,
+    camera_index=int(os.environ.get('CAMERA_INDEX', 0)),
+    capture_options=capture_options,
+    source_factory=(lambda: open_source(FRAME_SOURCE, loop=True, realtime=True, **capture_options))
+    if FRAME_SOURCE else None,
+    timer=stage_timer,
+    on_start=reset_tracking,
+    extra_demand=lambda: len(landmark_subscribers) + len(gesture_sessions),
+    # MJPEG output: JPEG_QUALITY (0-100), STREAM_SCALE (e.g. 0.5) and
+    # STREAM_MAX_FPS (0 = as fast as the scheduler runs)
+    encoder=JpegEncoder(
+        quality=int(os.environ.get('JPEG_QUALITY', 80)),
+        scale=float(os.environ.get('STREAM_SCALE', 1.0)),
+        max_fps=float(os.environ.get('STREAM_MAX_FPS', 0)),
+    ),
+)
 
 def generate_frames():
-    cap = cv2.VideoCapture(0)
-    CONFIRMATION_THRESHOLD = 15
-    COOLDOWN_TIME = 1.0
-
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
-
-        H, W, _ = frame.shape
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(frame_rgb)
-
-        if results.multi_hand_landmarks:
-            data_aux = []
-            x_ = []
-            y_ = []
-            hand_landmarks = results.multi_hand_landmarks[0]
-
-            # Draw for visual feedback in the stream
-            mp_drawing.draw_landmarks(
-                frame, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                mp_drawing_styles.get_default_hand_landmarks_style(),
-                mp_drawing_styles.get_default_hand_connections_style())
-
-            for i in range(len(hand_landmarks.landmark)):
-                x = hand_landmarks.landmark[i].x
-                y = hand_landmarks.landmark[i].y
-                x_.append(x)
-                y_.append(y)
-
-            for i in range(len(hand_landmarks.landmark)):
-                data_aux.append(hand_landmarks.landmark[i].x - min(x_))
-                data_aux.append(hand_landmarks.landmark[i].y - min(y_))
-
-            if model:
-                prediction = model.predict([np.asarray(data_aux)])
-                predicted_char = labels_dict[int(prediction[0])]
-
-                # --- START OF DRAWING LOGIC ---
-                # Calculate bounding box coordinates based on landmark min/max
-                x1, y1 = int(min(x_) * W) - 10, int(min(y_) * H) - 10
-                x2, y2 = int(max(x_) * W) + 10, int(max(y_) * H) + 10
-                
-                # Draw the Green Bounding Box
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 4)
-                
-                # Draw the Predicted Character Text (Green)
-                cv2.putText(frame, predicted_char, (x1, y1 - 10), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 255, 0), 3, cv2.LINE_AA)
-                # --- END OF DRAWING LOGIC ---
-
-                # Debouncing Logic (Unchanged)
-                if predicted_char == gesture_state["last_predicted_char"]:
-                    gesture_state["prediction_counter"] += 1
-                else:
-                    gesture_state["prediction_counter"] = 0
-                    gesture_state["last_predicted_char"] = predicted_char
-
-                if gesture_state["prediction_counter"] >= CONFIRMATION_THRESHOLD:
-                    if time.time() - gesture_state["last_add_time"] > COOLDOWN_TIME:
-                        # Emit the single character to Frontend
-                        socketio.emit('new_letter', {'letter': predicted_char})
-                        gesture_state["last_add_time"] = time.time()
-                        gesture_state["prediction_counter"] = 0
-
-        # Encode frame
-        ret, buffer = cv2.imencode('.jpg', frame)
+    capture_worker.ensure_running()
+    for jpeg in frame_hub.stream():
         yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-    cap.release()
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
 
 @app.route('/api/video_feed')
 def video_feed():
     return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/inference/stats', methods=['GET'])
+def inference_stats():
+    stats = predictor.stats()
+    stats['model'] = model_holder.info()
+    stats['scheduler'] = frame_scheduler.stats()
+    stats['encoder'] = capture_worker.encoder.stats()
+    stats['video_subscribers'] = frame_hub.subscribers
+    return jsonify(stats)
+
+metrics.gauge('gestvox_stream_fps', 'Frames per second delivered by the capture loop', callback=lambda: frame_scheduler.fps)
+metrics.gauge('gestvox_frames_captured', 'Frames read since the capture worker started', callback=lambda: frame_scheduler.frames)
+metrics.gauge('gestvox_frames_dropped', 'Stale camera frames skipped', callback=lambda: frame_scheduler.dropped_frames)
+metrics.gauge('gestvox_inference_interval', 'Run inference on every Nth frame', callback=lambda: frame_scheduler.inference_interval)
+metrics.gauge('gestvox_video_subscribers', 'Open /api/video_feed streams', callback=lambda: frame_hub.subscribers)
+metrics.gauge('gestvox_landmark_subscribers', 'Landmark-only Socket.IO clients', callback=lambda: len(landmark_subscribers))
+metrics.gauge('gestvox_gesture_sessions', 'Socket.IO clients subscribed to recognized letters', callback=lambda: len(gesture_sessions))
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+def is_admin_request():
+    # Admin endpoints are disabled unless ADMIN_TOKEN is set; requests must
+    # send it in X-Admin-Token. (A localhost check would let anything behind
+    # a local reverse proxy through.)
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+@app.route('/api/admin/model', methods=['GET'])
+def admin_model_info():
+    if not is_admin_request():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(model_holder.info())
+
+@app.route('/api/admin/model/reload', methods=['POST'])
+def admin_model_reload():
+    # Swaps the served model in place; the video stream and sockets stay up
+    if not is_admin_request():
+        return jsonify({"error": "forbidden"}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        model_holder.reload(data.get('version'))
+    except InvalidVersion as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        app.logger.exception('Model reload failed')
+        return jsonify({"error": str(e)}), 500
+    app.logger.info(f"Model reloaded: version={model_holder.current.version}")
+    return jsonify(model_holder.info()), 200
 # --- DATABASE CONFIGURATION ---
 # UPDATE THIS with your actual password
 db_config = {
@@ -133,28 +320,42 @@ db_config = {
     'database': 'gestvox'
 }
 
+# Bounded pool shared by all routes (see db_pool.py). DB_POOL_SIZE caps open
+# connections, DB_POOL_TIMEOUT is how long a request waits for one and idle
+# connections older than DB_POOL_IDLE_CHECK seconds are pinged before reuse.
+db_pool = ConnectionPool(
+    db_config,
+    size=int(os.environ.get('DB_POOL_SIZE', 8)),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+    idle_check=float(os.environ.get('DB_POOL_IDLE_CHECK', 30)),
+    on_connect=DB_CONNECT_SECONDS.observe,
+)
+metrics.gauge('gestvox_db_pool_open', 'Open pooled MySQL connections', callback=lambda: db_pool.stats()['open'])
+metrics.gauge('gestvox_db_pool_in_use', 'Pooled connections currently borrowed', callback=lambda: db_pool.stats()['in_use'])
+metrics.gauge('gestvox_db_pool_timeouts', 'Checkouts that gave up waiting', callback=lambda: db_pool.timeouts)
+metrics.gauge('gestvox_db_pool_reconnects', 'Idle connections replaced after a failed ping', callback=lambda: db_pool.reconnects)
+
 def get_db_connection():
-    # Try default connection first. Some MySQL servers (MySQL 8+) use
-    # caching_sha2_password as the default authentication plugin which
-    # can cause the client library to error if it doesn't support it.
-    try:
-        return mysql.connector.connect(**db_config)
-    except mysql.connector.Error as e:
-        msg = str(e).lower()
-        # If the error is related to caching_sha2_password, retry with
-        # the older mysql_native_password plugin (best-effort fallback).
-        if 'caching_sha2_password' in msg or 'auth plugin' in msg:
-            cfg = dict(db_config)
-            cfg['auth_plugin'] = 'mysql_native_password'
-            try:
-                conn = mysql.connector.connect(**cfg)
-                # annotate connection object for diagnostics
-                setattr(conn, '_auth_fallback_used', True)
-                return conn
-            except Exception:
-                # If fallback also fails, raise original exception for clarity
-                raise
-        raise
+    """Borrow a pooled connection; conn.close() gives it back.
+
+    Anything a request forgets to close (e.g. on an exception path) is
+    returned by release_db_connections when the request ends. Statements
+    are timed in DB_QUERY_SECONDS.
+    """
+    with DB_CHECKOUT_SECONDS.time():
+        conn = db_pool.get()
+    if has_request_context():
+        g.setdefault('db_connections', []).append(conn)
+    return TimedConnection(conn, DB_QUERY_SECONDS)
+
+@app.teardown_request
+def release_db_connections(exc=None):
+    for conn in g.pop('db_connections', []):
+        if not conn.released:
+            if exc is not None:
+                # Don't reuse a connection that was mid-way through a failure
+                conn.mark_broken()
+            conn.close()
 
 # # Run simple DB migrations to support anonymous (client token) sessions
 # # Adds 'client_token' columns and allows user_id to be NULL so un-auth'd users
@@ -189,6 +390,48 @@ def get_db_connection():
 # # Execute migrations at startup
 # run_db_migrations()
 
+# In-memory tier in front of the MySQL caches: (owner, text, source, target)
+# -> translation and (owner, text, language, voice) -> audio path. Entries are
+# filled from DB hits and refreshed on every insert; CACHE_TTL bounds staleness.
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 3600))
+translation_cache = TTLCache(int(os.environ.get('TRANSLATION_CACHE_SIZE', 4096)), CACHE_TTL, name='translation')
+tts_cache = TTLCache(int(os.environ.get('TTS_CACHE_SIZE', 2048)), CACHE_TTL, name='tts')
+
+def owner_key(user_id, client_token):
+    """Owner part of the memory-cache keys.
+
+    The DB lookups behind these caches only match the requesting owner's
+    rows (and a miss writes a row for that owner), so memory entries are
+    per owner too: a hit must never skip the row another owner's history
+    needs.
+    """
+    return (str(user_id) if user_id else None, client_token or None)
+
+def _load_language_ids():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT language_code, language_id FROM languages")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+# language_code -> language_id, without a query per request
+language_ids = RefreshingMap(_load_language_ids, ttl=float(os.environ.get('LANGUAGE_CACHE_TTL', 300)))
+
+for _cache in (translation_cache, tts_cache):
+    metrics.gauge(f'gestvox_{_cache.name}_memory_cache_entries', f'Entries in the in-memory {_cache.name} cache',
+                  callback=_cache.__len__)
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'translation': translation_cache.stats(),
+        'tts': tts_cache.stats(),
+        'language_table_loads': language_ids.loads,
+    })
+
 # ==========================================
 # HEALTH CHECK
 # ==========================================
@@ -198,9 +441,9 @@ def health():
         conn = get_db_connection()
         conn.ping(reconnect=True)
         conn.close()
-        return jsonify({"status": "ok"}), 200
+        return jsonify({"status": "ok", "db_pool": db_pool.stats()}), 200
     except Exception as e:
-        return jsonify({"status": "error", "detail": str(e)}), 500
+        return jsonify({"status": "error", "detail": str(e), "db_pool": db_pool.stats()}), 500
 
 
 # Simple glove simulate endpoint: returns a random gesture text (one-off trigger)
@@ -298,25 +541,45 @@ def login():
 # CHATBOT ROUTES
 # ==========================================
 
+# Explicit column lists for the paginated reads (no SELECT *)
+CHATBOT_SESSION_COLUMNS = ('chatbot_session_id', 'user_id', 'client_token', 'started_at', 'ended_at')
+HOME_SESSION_COLUMNS = ('home_session_id', 'user_id', 'client_token', 'title', 'started_at')
+HOME_MESSAGE_COLUMNS = ('home_message_id', 'home_session_id', 'sender', 'input_text', 'translated_text', 'created_at')
+TTS_SESSION_COLUMNS = ('tts_id', 'user_id', 'client_token', 'input_text', 'language_id', 'voice', 'audio_path', 'created_at')
+TRANSLATION_SESSION_COLUMNS = ('translation_id', 'user_id', 'client_token', 'input_text', 'output_text',
+                               'source_language_id', 'target_language_id', 'created_at')
+
+def owner_filter(user_id, client_token, prefer_token=True):
+    # Same precedence the routes always had: client_token first, else user_id
+    if client_token and (prefer_token or not user_id):
+        return 'client_token = %s', (client_token,)
+    return 'user_id = %s', (user_id,)
+
+def paged_json(page, prefix=''):
+    response = jsonify(page.rows)
+    response.headers.update(page.headers(prefix))
+    return response
+
+def bad_page_request(e):
+    return jsonify({"error": str(e)}), 400
+
 @app.route('/api/chatbot/history', methods=['GET'])
 def get_chat_history():
     user_id = request.args.get('user_id')
     client_token = request.args.get('client_token')
+    try:
+        page_request = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return bad_page_request(e)
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-
-    if client_token:
-        query = "SELECT * FROM chatbot_sessions WHERE client_token = %s ORDER BY started_at DESC"
-        cursor.execute(query, (client_token,))
-    else:
-        query = "SELECT * FROM chatbot_sessions WHERE user_id = %s ORDER BY started_at DESC"
-        cursor.execute(query, (user_id,))
-
-    sessions = cursor.fetchall()
+    where, params = owner_filter(user_id, client_token)
+    page = fetch_page(cursor, 'chatbot_sessions', CHATBOT_SESSION_COLUMNS, 'started_at', 'chatbot_session_id',
+                      page_request, where, params)
     cursor.close()
     conn.close()
-    return jsonify(sessions)
+    return paged_json(page)
 
 @app.route('/api/chatbot/session', methods=['POST'])
 def create_session():
@@ -351,29 +614,93 @@ def delete_chatbot_session(session_id):
         conn.close()
     return jsonify({"status": "deleted"}), 200
 
-@app.route('/api/chatbot/message', methods=['POST'])
-def save_message():
-    data = request.json
-    session_id = data.get('chatbot_session_id')
-    sender = data.get('sender')
-    input_text = data.get('input_text')
-    output_text = data.get('output_text')
+# --- MESSAGE WRITES ---
+# MESSAGE_WRITE_BEHIND=1 queues single-message posts and writes them in one
+# transaction every MESSAGE_FLUSH_INTERVAL seconds (sooner once
+# MESSAGE_FLUSH_ROWS are waiting); the queue is flushed on shutdown. Those
+# posts answer 202 and reach the history endpoints after the next flush.
+MESSAGES_WRITTEN = metrics.counter('gestvox_messages_written', 'Chat/home messages inserted', ('path',))
+MESSAGE_FLUSH_SECONDS = metrics.histogram('gestvox_message_flush_seconds', 'Write-behind flush transaction time')
+MESSAGE_BATCH_MAX = int(os.environ.get('MESSAGE_BATCH_MAX', 1000))
+
+def _record_flush(rows, seconds):
+    MESSAGES_WRITTEN.inc(rows, path='write_behind')
+    MESSAGE_FLUSH_SECONDS.observe(seconds)
+
+message_buffer = None
+if os.environ.get('MESSAGE_WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes'):
+    message_buffer = WriteBehindBuffer(
+        get_db_connection,
+        flush_interval=float(os.environ.get('MESSAGE_FLUSH_INTERVAL', 0.25)),
+        max_rows=int(os.environ.get('MESSAGE_FLUSH_ROWS', 500)),
+        max_pending=int(os.environ.get('MESSAGE_BUFFER_MAX', 20000)),
+        on_flush=_record_flush,
+    )
+    metrics.gauge('gestvox_message_buffer_pending', 'Messages waiting for the next write-behind flush',
+                  callback=message_buffer.__len__)
+    metrics.gauge('gestvox_message_buffer_dropped', 'Buffered messages dropped while the database was failing',
+                  callback=lambda: message_buffer.dropped_rows)
+    metrics.gauge('gestvox_message_buffer_rejected', 'Buffered messages MySQL rejected as bad data and dropped',
+                  callback=lambda: message_buffer.rejected_rows)
+
+def save_single_message(kind, data):
+    """Insert one message now, or queue it when write-behind is enabled."""
+    try:
+        row = message_row(kind, data or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if message_buffer is not None:
+        message_buffer.add(kind, row)
+        return jsonify({"status": "queued"}), 202
 
     conn = get_db_connection()
-    cursor = conn.cursor()
+    try:
+        insert_messages(conn, {kind: [row]})
+    finally:
+        conn.close()
+    MESSAGES_WRITTEN.inc(path='direct')
+    return jsonify({"status": "saved"}), 201
+
+@app.route('/api/messages/batch', methods=['POST'])
+def save_message_batch():
+    """Insert many messages in one transaction.
 
-    query = """
-        INSERT INTO chatbot_messages 
-        (chatbot_session_id, sender, input_text, output_text) 
-        VALUES (%s, %s, %s, %s)
+    Body: {"chatbot": [{chatbot_session_id, sender, input_text, output_text}, ...],
+           "home": [{home_session_id, sender, input_text, translated_text}, ...]}
+    Each list is written with one multi-row INSERT; either every message is
+    saved or none is.
     """
-    cursor.execute(query, (session_id, sender, input_text, output_text))
-    conn.commit()
+    data = request.json or {}
+    rows_by_kind = {}
+    try:
+        for kind in MESSAGE_TABLES:
+            items = data.get(kind) or []
+            if not isinstance(items, list):
+                return jsonify({"error": f"{kind} must be a list"}), 400
+            rows_by_kind[kind] = [message_row(kind, item) for item in items]
+    except (ValueError, AttributeError) as e:
+        return jsonify({"error": str(e) or "each message must be an object"}), 400
+    total = sum(len(rows) for rows in rows_by_kind.values())
+    if total > MESSAGE_BATCH_MAX:
+        return jsonify({"error": f"at most {MESSAGE_BATCH_MAX} messages per batch"}), 400
+    if not total:
+        return jsonify({"status": "saved", "saved": {}}), 200
 
-    cursor.close()
-    conn.close()
+    conn = get_db_connection()
+    try:
+        counts = insert_messages(conn, rows_by_kind)
+    finally:
+        conn.close()
+    MESSAGES_WRITTEN.inc(total, path='batch')
+    return jsonify({"status": "saved", "saved": counts}), 201
 
-    return jsonify({"status": "saved"}), 201
+@app.route('/api/messages/stats', methods=['GET'])
+def message_write_stats():
+    return jsonify({"write_behind": message_buffer.stats() if message_buffer is not None else None})
+
+@app.route('/api/chatbot/message', methods=['POST'])
+def save_message():
+    return save_single_message('chatbot', request.json)
 
 # ==========================================
 # HOME / HISTORY ROUTES
@@ -383,21 +710,19 @@ def save_message():
 def get_home_history():
     user_id = request.args.get('user_id')
     client_token = request.args.get('client_token')
+    try:
+        page_request = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return bad_page_request(e)
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-
-    if client_token:
-        query = "SELECT * FROM home_sessions WHERE client_token = %s ORDER BY started_at DESC"
-        cursor.execute(query, (client_token,))
-    else:
-        query = "SELECT * FROM home_sessions WHERE user_id = %s ORDER BY started_at DESC"
-        cursor.execute(query, (user_id,))
-
-    sessions = cursor.fetchall()
+    where, params = owner_filter(user_id, client_token)
+    page = fetch_page(cursor, 'home_sessions', HOME_SESSION_COLUMNS, 'started_at', 'home_session_id',
+                      page_request, where, params)
     cursor.close()
     conn.close()
-    return jsonify(sessions)
+    return paged_json(page)
 
 @app.route('/api/home/session', methods=['POST'])
 def create_home_session():
@@ -422,32 +747,25 @@ def create_home_session():
 
 @app.route('/api/home/message', methods=['POST'])
 def save_home_message():
-    data = request.json
-    session_id = data.get('home_session_id')
-    sender = data.get('sender')
-    input_text = data.get('input_text')
-    translated = data.get('translated_text')
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    query = "INSERT INTO home_messages (home_session_id, sender, input_text, translated_text) VALUES (%s, %s, %s, %s)"
-    cursor.execute(query, (session_id, sender, input_text, translated))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    return jsonify({"status": "saved"}), 201
+    return save_single_message('home', request.json)
 
 @app.route('/api/home/messages', methods=['GET'])
 def get_home_messages():
+    # Oldest first (conversation order) by default, so the cursor walks
+    # forward in time; order=desc pages backwards from the newest message
     session_id = request.args.get('session_id')
+    descending = request.args.get('order', 'asc').lower() == 'desc'
+    try:
+        page_request = PageRequest.from_args(request.args, default_limit=200)
+    except ValueError as e:
+        return bad_page_request(e)
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    query = "SELECT * FROM home_messages WHERE home_session_id = %s ORDER BY created_at ASC"
-    cursor.execute(query, (session_id,))
-    messages = cursor.fetchall()
+    page = fetch_page(cursor, 'home_messages', HOME_MESSAGE_COLUMNS, 'created_at', 'home_message_id',
+                      page_request, 'home_session_id = %s', (session_id,), descending=descending)
     cursor.close()
     conn.close()
-    return jsonify(messages)
+    return paged_json(page)
 
 @app.route('/api/home/session/<int:session_id>', methods=['DELETE'])
 def delete_home_session(session_id):
@@ -464,25 +782,80 @@ def delete_home_session(session_id):
 
 @app.route('/api/history', methods=['GET'])
 def get_all_history():
+    # Two independently paged lists: home_limit/home_cursor and
+    # chatbot_limit/chatbot_cursor, with X-Home-*/X-Chatbot-* headers
     user_id = request.args.get('user_id')
     client_token = request.args.get('client_token')
+    try:
+        home_request = PageRequest.from_args(request.args, prefix='home_')
+        chatbot_request = PageRequest.from_args(request.args, prefix='chatbot_')
+    except ValueError as e:
+        return bad_page_request(e)
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    if client_token:
-        cursor.execute("SELECT * FROM home_sessions WHERE client_token = %s ORDER BY started_at DESC", (client_token,))
-        home = cursor.fetchall()
-        cursor.execute("SELECT * FROM chatbot_sessions WHERE client_token = %s ORDER BY started_at DESC", (client_token,))
-        chatbot = cursor.fetchall()
-    else:
-        cursor.execute("SELECT * FROM home_sessions WHERE user_id = %s ORDER BY started_at DESC", (user_id,))
-        home = cursor.fetchall()
-        cursor.execute("SELECT * FROM chatbot_sessions WHERE user_id = %s ORDER BY started_at DESC", (user_id,))
-        chatbot = cursor.fetchall()
+    where, params = owner_filter(user_id, client_token)
+    home = fetch_page(cursor, 'home_sessions', HOME_SESSION_COLUMNS, 'started_at', 'home_session_id',
+                      home_request, where, params)
+    chatbot = fetch_page(cursor, 'chatbot_sessions', CHATBOT_SESSION_COLUMNS, 'started_at', 'chatbot_session_id',
+                         chatbot_request, where, params)
 
     cursor.close()
     conn.close()
-    return jsonify({"home": home, "chatbot": chatbot})
+    response = jsonify({"home": home.rows, "chatbot": chatbot.rows})
+    response.headers.update(home.headers('Home-'))
+    response.headers.update(chatbot.headers('Chatbot-'))
+    return response
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+@app.route('/api/export', methods=['GET'])
+def export_history():
+    """Stream a user's (or client token's) whole history: ?format=ndjson|csv&since=<ISO time>&kinds=home,chatbot,...
+
+    Rows come from server-side cursors and are written as they are read,
+    so the export runs in constant memory; `since` makes incremental
+    exports cheap.
+    """
+    user_id = request.args.get('user_id')
+    client_token = request.args.get('client_token')
+    if not user_id and not client_token:
+        return jsonify({"error": "user_id or client_token required"}), 400
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(EXPORT_FORMATS)}"}), 400
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since.replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({"error": "since must be an ISO 8601 timestamp"}), 400
+    else:
+        since = None
+    kinds = [k for k in request.args.get('kinds', 'home,chatbot,translation,tts').split(',') if k]
+    unknown = set(kinds) - set(SESSION_KINDS) - set(FLAT_KINDS)
+    if unknown:
+        return jsonify({"error": f"unknown kinds: {sorted(unknown)}"}), 400
+
+    owner_column, owner_value = ('client_token', client_token) if client_token else ('user_id', user_id)
+    formatter, mimetype = EXPORT_FORMATS[fmt]
+    conn = get_db_connection()
+
+    def generate():
+        try:
+            yield from formatter(iter_records(conn, owner_column, owner_value, since, kinds))
+        finally:
+            conn.close()
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="gestvox-history.{fmt}"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Ask reverse proxies (nginx) not to buffer the whole export
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/migrate_sessions', methods=['POST'])
 def migrate_sessions():
@@ -630,113 +1003,279 @@ def preferences():
 # ==========================================
 # SMART TTS ROUTE (Modified to Generate & Save)
 # ==========================================
+TTS_VOICE = 'gtts_default'
+TTS_WAIT_TIMEOUT = float(os.environ.get('TTS_WAIT_TIMEOUT', 2))
+
+def _store_tts_job(job, owners):
+    """Runs on a TTS worker once the audio file exists: one row per requesting owner."""
+    web_path = tts_queue.web_path(job.filename)
+    input_hash = text_hash(job.text)
+    row_ids = {}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # 3. SAVE TO DB (allow NULL user_id/client_token)
+        for user_id, client_token in owners or [(None, None)]:
+            cursor.execute("""
+                INSERT INTO tts_sessions (user_id, client_token, input_text, input_hash, language_id, voice, audio_path) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (user_id, client_token, job.text, input_hash, job.meta.get('language_id'), job.voice, web_path))
+            row_ids[(user_id, client_token)] = cursor.lastrowid
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    for owner in owners or [(None, None)]:
+        tts_cache.set((owner,) + job.key, web_path)
+    audio_store.add(job.filename)
+    app.logger.info(f"TTS session saved: tts_ids={list(row_ids.values())}, language_id={job.meta.get('language_id')}, file={job.filename}")
+    job.meta['row_ids'] = row_ids
+    return {"tts_id": next(iter(row_ids.values()), None)}
+
+def _forget_audio(filenames):
+    """Evicted files become cache misses: clear their DB rows' audio_path and memory entries."""
+    paths = [f'{prefix}/{name}' for name in filenames for prefix in ('/api/audio', '/static/audio')]
+    tts_cache.invalidate_where(lambda key, value: value in paths)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"UPDATE tts_sessions SET audio_path = NULL WHERE audio_path IN ({', '.join(['%s'] * len(paths))})",
+                       tuple(paths))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    app.logger.info(f"Evicted {len(filenames)} audio files over the AUDIO_STORE_MAX_MB quota")
+
+# Generated audio is kept under AUDIO_STORE_MAX_MB; least recently played files go first
+AUDIO_DIR = os.path.join(app.root_path, 'static', 'audio')
+AUDIO_MAX_AGE = int(os.environ.get('AUDIO_MAX_AGE', 365 * 24 * 3600))
+audio_store = AudioStore(AUDIO_DIR, max_bytes=float(os.environ.get('AUDIO_STORE_MAX_MB', 512)) * 1024 * 1024,
+                         on_evict=_forget_audio)
+metrics.gauge('gestvox_audio_store_bytes', 'Bytes of generated audio on disk', callback=lambda: audio_store.stats()['bytes'])
+metrics.gauge('gestvox_audio_store_evicted_files', 'Audio files evicted over quota', callback=lambda: audio_store.evicted)
+
+def audio_available(audio_path):
+    return bool(audio_path) and audio_store.exists(os.path.basename(audio_path))
+
+# Speech synthesis runs on TTS_WORKERS background threads (TTS_ENGINE=gtts|stub,
+# see tts_jobs.py); files are named by a hash of (text, language, voice)
+tts_queue = TTSJobQueue(
+    get_engine(os.environ.get('TTS_ENGINE', 'gtts')),
+    AUDIO_DIR,
+    web_prefix='/api/audio',
+    workers=int(os.environ.get('TTS_WORKERS', 2)),
+    on_done=_store_tts_job,
+)
+metrics.gauge('gestvox_tts_jobs_in_flight', 'TTS jobs queued or running', callback=lambda: tts_queue.stats()['in_flight'])
+metrics.gauge('gestvox_tts_jobs_deduplicated', 'TTS requests that joined an existing job',
+              callback=lambda: tts_queue.deduplicated)
+
+def first_matching(rows, input_text):
+    # Rows were found by input_hash; keep the first whose text really matches
+    for row in rows:
+        if same_text(row['input_text'], input_text):
+            return row
+    return None
+
 @app.route('/api/tts', methods=['GET', 'POST'])
 def tts_sessions_api():
     # GET: Just fetch history
     if request.method == 'GET':
         user_id = request.args.get('user_id')
         client_token = request.args.get('client_token')
+        try:
+            page_request = PageRequest.from_args(request.args)
+        except ValueError as e:
+            return bad_page_request(e)
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        if user_id:
-            cursor.execute("SELECT * FROM tts_sessions WHERE user_id = %s ORDER BY created_at DESC", (user_id,))
-        elif client_token:
-            cursor.execute("SELECT * FROM tts_sessions WHERE client_token = %s ORDER BY created_at DESC", (client_token,))
+        if user_id or client_token:
+            where, params = owner_filter(user_id, client_token, prefer_token=False)
         else:
-            cursor.execute("SELECT * FROM tts_sessions ORDER BY created_at DESC")
-        rows = cursor.fetchall()
+            where, params = '1=1', ()
+        page = fetch_page(cursor, 'tts_sessions', TTS_SESSION_COLUMNS, 'created_at', 'tts_id', page_request, where, params)
         cursor.close()
         conn.close()
-        return jsonify(rows)
+        return paged_json(page)
 
     # POST: Smart Generation (Check Cache -> Generate -> Save)
     data = request.json
     user_id = data.get('user_id')
+    client_token = data.get('client_token')
     input_text = data.get('input_text')
     language_code = data.get('language_code', 'en') # e.g. 'en', 'es'
+    owner = owner_key(user_id, client_token)
     
-    # 1. CHECK CACHE
+    # 1. CHECK CACHE (memory first: a hit never touches MySQL)
+    memory_key = (owner, normalize_text(input_text), language_code, TTS_VOICE)
+    audio_path = tts_cache.get(memory_key)
+    if audio_path and not audio_available(audio_path):
+        tts_cache.invalidate(memory_key)
+        audio_path = None
+    CACHE_LOOKUPS.inc(cache='tts', tier='memory', result='hit' if audio_path else 'miss')
+    if audio_path:
+        return jsonify({"status": "success", "audio_path": audio_path, "cached": True})
+
+    # Find language_id for query
+    language_id = language_ids.get(language_code) or 1
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    
-    # Find language_id for query
-    cursor.execute("SELECT language_id FROM languages WHERE language_code = %s", (language_code,))
-    lang_res = cursor.fetchone()
-    language_id = lang_res['language_id'] if lang_res else 1
 
-    client_token = data.get('client_token')
+    input_hash = text_hash(input_text)
 
-    # Prefer user-specific or client-specific cached entry; otherwise fall back to global cache
+    # Prefer user-specific or client-specific cached entry; otherwise fall back to global cache.
+    # input_hash + language + voice is indexed (idx_tts_lookup); the text itself is
+    # compared in Python to rule out hash collisions.
     if user_id or client_token:
-        query = "SELECT audio_path FROM tts_sessions WHERE input_text = %s AND language_id = %s AND (user_id = %s OR client_token = %s) LIMIT 1"
-        cursor.execute(query, (input_text, language_id, user_id, client_token))
+        query = ("SELECT input_text, audio_path FROM tts_sessions WHERE input_hash = %s AND language_id = %s AND voice = %s "
+                 "AND audio_path IS NOT NULL AND (user_id = %s OR client_token = %s) LIMIT 5")
+        cursor.execute(query, (input_hash, language_id, TTS_VOICE, user_id, client_token))
     else:
-        query = "SELECT audio_path FROM tts_sessions WHERE input_text = %s AND language_id = %s LIMIT 1"
-        cursor.execute(query, (input_text, language_id))
-    existing_record = cursor.fetchone()
+        query = ("SELECT input_text, audio_path FROM tts_sessions WHERE input_hash = %s AND language_id = %s AND voice = %s "
+                 "AND audio_path IS NOT NULL LIMIT 5")
+        cursor.execute(query, (input_hash, language_id, TTS_VOICE))
+    existing_record = first_matching(cursor.fetchall(), input_text)
+    cursor.close()
+    conn.close()
+    if existing_record and not audio_available(existing_record['audio_path']):
+        # The file was evicted or deleted; regenerate rather than hand out a dead link
+        existing_record = None
+    CACHE_LOOKUPS.inc(cache='tts', tier='db', result='hit' if existing_record else 'miss')
     
     if existing_record:
-        cursor.close()
-        conn.close()
+        tts_cache.set(memory_key, existing_record['audio_path'])
         return jsonify({"status": "success", "audio_path": existing_record['audio_path'], "cached": True})
 
-    # 2. GENERATE
+    # 2. GENERATE in the background (allow anonymous or client token usage:
+    # do not require user_id). Identical concurrent requests join one job; we
+    # wait up to TTS_WAIT_TIMEOUT and otherwise hand back a job id to poll.
+    job = tts_queue.submit(input_text, language_code, TTS_VOICE, owner=owner, meta={'language_id': language_id})
+    if not job.wait(TTS_WAIT_TIMEOUT):
+        return jsonify({"status": "pending", "job_id": job.id, "status_url": f"/api/tts/jobs/{job.id}"}), 202
+    if job.status != 'done':
+        return jsonify({"error": job.error or 'TTS generation failed', "job_id": job.id}), 500
+    return jsonify({"status": "success", "audio_path": job.result['audio_path'], "cached": job.reused_file,
+                    "tts_id": job.meta.get('row_ids', {}).get(owner, job.result.get('tts_id'))})
+
+@app.route('/api/audio/<filename>', methods=['GET'])
+def serve_audio(filename):
+    # Names are content hashes, so a file never changes: the name is the ETag
+    # and clients may cache it for good. send_file handles If-None-Match (304)
+    # and Range requests (206) for seeking.
+    path = audio_store.path(filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({"error": "not found"}), 404
+    audio_store.touch(filename)
+    response = send_file(path, mimetype='audio/mpeg', conditional=True,
+                         etag=os.path.splitext(filename)[0], max_age=AUDIO_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={AUDIO_MAX_AGE}, immutable'
+    return response
+
+@app.route('/api/tts/jobs/<job_id>', methods=['GET'])
+def tts_job_status(job_id):
+    job = tts_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job.to_dict())
+
+# ==========================================
+# SMART TRANSLATION ROUTE (Modified to Translate & Save)
+# ==========================================
+# Upstream translator behind an interface (TRANSLATOR_BACKEND=google|stub, see
+# translators.py). Calls run on a bounded pool so a slow upstream can't tie up
+# every request thread, and each one is given TRANSLATION_TIMEOUT seconds.
+translator = get_translator(os.environ.get('TRANSLATOR_BACKEND', 'google'),
+                            **({'delay_ms': float(os.environ.get('TRANSLATOR_STUB_DELAY_MS', 0))}
+                               if os.environ.get('TRANSLATOR_BACKEND') == 'stub' else {}))
+translation_pool = ThreadPoolExecutor(max_workers=int(os.environ.get('TRANSLATION_WORKERS', 8)),
+                                      thread_name_prefix='translate')
+TRANSLATION_TIMEOUT = float(os.environ.get('TRANSLATION_TIMEOUT', 10))
+TRANSLATION_BATCH_TIMEOUT = float(os.environ.get('TRANSLATION_BATCH_TIMEOUT', 20))
+TRANSLATION_BATCH_MAX = int(os.environ.get('TRANSLATION_BATCH_MAX', 100))
+translation_flight = SingleFlight()
+translation_store_flight = SingleFlight()
+UPSTREAM_SECONDS = metrics.histogram('gestvox_upstream_translate_seconds', 'Upstream translator call time', ('backend',))
+metrics.gauge('gestvox_translations_in_flight', 'Distinct upstream translations running', callback=translation_flight.in_flight)
+metrics.gauge('gestvox_translations_shared', 'Requests that joined an in-flight upstream call',
+              callback=lambda: translation_flight.shared)
+
+def _timed_translate(text, source, target, deadline):
+    # A call still queued when its caller gave up is dropped instead of
+    # holding a pool worker for an answer nobody will read
+    if time.monotonic() > deadline:
+        raise FuturesTimeout('translation abandoned: its deadline passed while queued')
+    with UPSTREAM_SECONDS.time(backend=translator.name):
+        return translator.translate(text, source, target)
+
+def upstream_translate(text, source, target, timeout=TRANSLATION_TIMEOUT):
+    """Future for the upstream translation; identical concurrent calls share one.
+
+    The call is skipped if it hasn't started within `timeout` seconds. One
+    already talking to the upstream can't be interrupted (the translator
+    clients have no timeout hook), so the pool size bounds those.
+    """
+    deadline = time.monotonic() + timeout
+    return translation_flight.submit(
+        (normalize_text(text), source, target),
+        lambda: translation_pool.submit(_timed_translate, text, source, target, deadline))
+
+def find_cached_translation(cursor, input_text, input_hash, src_id, tgt_id, user_id=None, client_token=None):
+    # Served by idx_translation_lookup (input_hash, source, target)
+    if user_id or client_token:
+        query = """
+            SELECT input_text, output_text FROM translation_sessions 
+            WHERE input_hash = %s AND source_language_id = %s AND target_language_id = %s AND (user_id = %s OR client_token = %s)
+            LIMIT 5
+        """
+        cursor.execute(query, (input_hash, src_id, tgt_id, user_id, client_token))
+    else:
+        query = """
+            SELECT input_text, output_text FROM translation_sessions 
+            WHERE input_hash = %s AND source_language_id = %s AND target_language_id = %s
+            LIMIT 5
+        """
+        cursor.execute(query, (input_hash, src_id, tgt_id))
+    return first_matching(cursor.fetchall(), input_text)
+
+def insert_translations(rows):
+    """Insert (user_id, client_token, input_text, input_hash, output_text, src_id, tgt_id) rows; returns the first id."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        # Allow anonymous or client token usage: do not require user_id
-        # Create unique filename
-        filename = f"tts_{abs(hash(input_text))}_{language_code}.mp3"
-        # Ensure static/audio folder exists
-        save_dir = os.path.join(app.root_path, 'static', 'audio')
-        os.makedirs(save_dir, exist_ok=True)
-        save_path = os.path.join(save_dir, filename)
-        
-        # Determine URL path (for frontend to access)
-        web_path = f"/static/audio/{filename}"
-
-        tts = gTTS(text=input_text, lang=language_code, slow=False)
-        tts.save(save_path)
-        
-        # 3. SAVE TO DB (allow NULL user_id/client_token)
-        cursor.execute("""
-            INSERT INTO tts_sessions (user_id, client_token, input_text, language_id, voice, audio_path) 
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (user_id if user_id else None, client_token if client_token else None, input_text, language_id, 'gtts_default', web_path))
+        cursor.executemany("""
+            INSERT INTO translation_sessions 
+            (user_id, client_token, input_text, input_hash, output_text, source_language_id, target_language_id) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, rows)
         conn.commit()
-        tts_id = cursor.lastrowid
-
-        app.logger.info(f"TTS session saved: tts_id={tts_id}, user_id={user_id}, client_token={client_token}, language_id={language_id}")
+        return cursor.lastrowid
+    finally:
         cursor.close()
         conn.close()
-        
-        return jsonify({"status": "success", "audio_path": web_path, "cached": False, "tts_id": tts_id})
 
-    except Exception as e:
-        app.logger.exception('TTS generation/storage failed')
-        if 'cursor' in locals(): cursor.close()
-        if 'conn' in locals(): conn.close()
-        return jsonify({"error": str(e)}), 500
-
-# ==========================================
-# SMART TRANSLATION ROUTE (Modified to Translate & Save)
-# ==========================================
 @app.route('/api/translation', methods=['GET', 'POST'])
 def translation_api():
     # GET: Fetch History
     if request.method == 'GET':
         user_id = request.args.get('user_id')
         client_token = request.args.get('client_token')
+        try:
+            page_request = PageRequest.from_args(request.args)
+        except ValueError as e:
+            return bad_page_request(e)
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        if user_id:
-            cursor.execute("SELECT * FROM translation_sessions WHERE user_id = %s ORDER BY created_at DESC", (user_id,))
-        elif client_token:
-            cursor.execute("SELECT * FROM translation_sessions WHERE client_token = %s ORDER BY created_at DESC", (client_token,))
+        if user_id or client_token:
+            where, params = owner_filter(user_id, client_token, prefer_token=False)
         else:
-            cursor.execute("SELECT * FROM translation_sessions ORDER BY created_at DESC")
-        rows = cursor.fetchall()
+            where, params = '1=1', ()
+        page = fetch_page(cursor, 'translation_sessions', TRANSLATION_SESSION_COLUMNS, 'created_at', 'translation_id',
+                          page_request, where, params)
         cursor.close()
         conn.close()
-        return jsonify(rows)
+        return paged_json(page)
 
     # POST: Smart Translation (Check Cache -> Translate -> Save)
     data = request.json
@@ -745,75 +1284,167 @@ def translation_api():
     source_lang = data.get('source_lang', 'en')
     target_lang = data.get('target_lang', 'es')
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    client_token = data.get('client_token')
 
-    # Helper to get ID
-    def get_lang_id(code):
-        cursor.execute("SELECT language_id FROM languages WHERE language_code = %s", (code,))
-        res = cursor.fetchone()
-        return res['language_id'] if res else None
+    # Memory tier first; only valid language pairs are ever stored in it
+    memory_key = (owner_key(user_id, client_token), normalize_text(input_text), source_lang, target_lang)
+    translated_text = translation_cache.get(memory_key)
+    CACHE_LOOKUPS.inc(cache='translation', tier='memory', result='hit' if translated_text is not None else 'miss')
+    if translated_text is not None:
+        return jsonify({"translated_text": translated_text, "cached": True})
 
-    src_id = get_lang_id(source_lang)
-    tgt_id = get_lang_id(target_lang)
+    src_id = language_ids.get(source_lang)
+    tgt_id = language_ids.get(target_lang)
 
     if not src_id or not tgt_id:
-        cursor.close()
-        conn.close()
         # Fallback if language codes not in DB, try to run anyway but can't cache properly without IDs
         # For now, just error or default
         return jsonify({"error": "Invalid language codes provided"}), 400
 
     # 1. CHECK CACHE
-    client_token = data.get('client_token')
-
-    if user_id or client_token:
-        query = """
-            SELECT output_text FROM translation_sessions 
-            WHERE input_text = %s AND source_language_id = %s AND target_language_id = %s AND (user_id = %s OR client_token = %s)
-            LIMIT 1
-        """
-        cursor.execute(query, (input_text, src_id, tgt_id, user_id, client_token))
-    else:
-        query = """
-            SELECT output_text FROM translation_sessions 
-            WHERE input_text = %s AND source_language_id = %s AND target_language_id = %s
-            LIMIT 1
-        """
-        cursor.execute(query, (input_text, src_id, tgt_id))
-    cached = cursor.fetchone()
+    input_hash = text_hash(input_text)
 
-    if cached:
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cached = find_cached_translation(cursor, input_text, input_hash, src_id, tgt_id, user_id, client_token)
+    finally:
         cursor.close()
         conn.close()
+    CACHE_LOOKUPS.inc(cache='translation', tier='db', result='hit' if cached else 'miss')
+
+    if cached:
+        translation_cache.set(memory_key, cached['output_text'])
         return jsonify({"translated_text": cached['output_text'], "cached": True})
 
-    # 2. TRANSLATE
+    # 2. TRANSLATE (no DB connection is held while waiting on the upstream call)
+    # Concurrent identical requests from the same owner share one upstream call
+    # and one inserted row; other owners share the upstream call only.
+    mine = Future()
+    shared = translation_store_flight.submit(memory_key, lambda: mine)
     try:
-        # Allow anonymous or client_token usage: do not require user_id
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
-        translated_text = translator.translate(input_text)
+        if shared is not mine:
+            return jsonify(shared.result(TRANSLATION_TIMEOUT))
+        try:
+            # Allow anonymous or client_token usage: do not require user_id
+            translated_text = upstream_translate(input_text, source_lang, target_lang).result(TRANSLATION_TIMEOUT)
+
+            # 3. SAVE TO DB (allow NULL user_id/client_token)
+            translation_id = insert_translations([
+                (user_id if user_id else None, client_token if client_token else None,
+                 input_text, input_hash, translated_text, src_id, tgt_id)])
+            translation_cache.set(memory_key, translated_text)
+            app.logger.info(f"Translation saved: id={translation_id}, user_id={user_id}, client_token={client_token}, src={src_id}, tgt={tgt_id}")
+            body = {"translated_text": translated_text, "cached": False, "translation_id": translation_id}
+        except BaseException as e:
+            mine.set_exception(e)
+            raise
+        mine.set_result(body)
+        return jsonify(body)
+
+    except FuturesTimeout:
+        return jsonify({"error": f"translation timed out after {TRANSLATION_TIMEOUT}s"}), 504
+    except Exception as e:
+        app.logger.exception('Translation generation/storage failed')
+        return jsonify({"error": str(e)}), 500
 
-        # 3. SAVE TO DB (allow NULL user_id/client_token)
-        cursor.execute("""
-            INSERT INTO translation_sessions 
-            (user_id, client_token, input_text, output_text, source_language_id, target_language_id) 
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (user_id if user_id else None, client_token if client_token else None, input_text, translated_text, src_id, tgt_id))
-        conn.commit()
-        translation_id = cursor.lastrowid
+@app.route('/api/translation/batch', methods=['POST'])
+def translation_batch():
+    """Translate many strings and/or into many target languages in one call.
 
-        app.logger.info(f"Translation saved: id={translation_id}, user_id={user_id}, client_token={client_token}, src={src_id}, tgt={tgt_id}")
-        cursor.close()
-        conn.close()
+    Body: {"texts": [...], "source_lang": "en", "target_langs": ["es", "fr"],
+    "user_id"/"client_token", "store": true}. Results come back in
+    text-major order per target language as a "results" list; items that
+    failed or timed out carry an "error" instead of "translated_text".
+    """
+    data = request.json or {}
+    texts = data.get('texts') or ([data['input_text']] if data.get('input_text') else [])
+    targets = data.get('target_langs') or [data.get('target_lang', 'es')]
+    source_lang = data.get('source_lang', 'en')
+    user_id = data.get('user_id')
+    client_token = data.get('client_token')
+    store = data.get('store', True)
 
-        return jsonify({"translated_text": translated_text, "cached": False, "translation_id": translation_id})
+    def strings(value):
+        return isinstance(value, list) and all(isinstance(v, str) and v.strip() for v in value)
+    if not strings(texts) or not strings(targets) or not isinstance(source_lang, str):
+        return jsonify({"error": "texts and target_langs must be lists of non-empty strings"}), 400
 
-    except Exception as e:
-        app.logger.exception('Translation generation/storage failed')
-        if 'cursor' in locals(): cursor.close()
-        if 'conn' in locals(): conn.close()
-        return jsonify({"error": str(e)}), 500
+    items = [(text, target) for target in targets for text in texts]
+    if not items:
+        return jsonify({"error": "texts required"}), 400
+    if len(items) > TRANSLATION_BATCH_MAX:
+        return jsonify({"error": f"at most {TRANSLATION_BATCH_MAX} text/language pairs per batch"}), 413
+
+    lang_ids = {code: language_ids.get(code) for code in set(targets) | {source_lang}}
+    if not all(lang_ids.values()):
+        return jsonify({"error": "Invalid language codes provided"}), 400
+    src_id = lang_ids[source_lang]
+
+    results = [{"input_text": text, "target_lang": target} for text, target in items]
+    owner = owner_key(user_id, client_token)
+    pending = {}  # memory key -> indexes into items
+    for i, (text, target) in enumerate(items):
+        key = (owner, normalize_text(text), source_lang, target)
+        hit = translation_cache.get(key)
+        CACHE_LOOKUPS.inc(cache='translation', tier='memory', result='hit' if hit is not None else 'miss')
+        if hit is not None:
+            results[i].update(translated_text=hit, cached=True)
+        else:
+            pending.setdefault(key, []).append(i)
+
+    def fill(indexes, **fields):
+        for i in indexes:
+            results[i].update(fields)
+
+    # DB tier: one borrowed connection for every remaining lookup
+    if pending:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for key, indexes in list(pending.items()):
+                text = items[indexes[0]][0]
+                row = find_cached_translation(cursor, text, text_hash(text), src_id, lang_ids[key[3]], user_id, client_token)
+                CACHE_LOOKUPS.inc(cache='translation', tier='db', result='hit' if row else 'miss')
+                if row:
+                    translation_cache.set(key, row['output_text'])
+                    fill(indexes, translated_text=row['output_text'], cached=True)
+                    del pending[key]
+        finally:
+            cursor.close()
+            conn.close()
+
+    # Upstream: all misses at once on the bounded pool, deduplicated
+    futures = {key: upstream_translate(items[indexes[0]][0], source_lang, key[3], TRANSLATION_BATCH_TIMEOUT)
+               for key, indexes in pending.items()}
+    done, _ = wait(futures.values(), timeout=TRANSLATION_BATCH_TIMEOUT)
+    rows = []
+    fresh = {}  # memory key -> translation, cached only once its row is stored
+    for key, future in futures.items():
+        indexes = pending[key]
+        if future not in done:
+            fill(indexes, error='timed out')
+        elif future.exception() is not None:
+            fill(indexes, error=str(future.exception()))
+        else:
+            text = items[indexes[0]][0]
+            translated_text = future.result()
+            fresh[key] = translated_text
+            fill(indexes, translated_text=translated_text, cached=False)
+            rows.append((user_id if user_id else None, client_token if client_token else None,
+                         text, text_hash(text), translated_text, src_id, lang_ids[key[3]]))
+
+    # A memory hit skips the DB lookup and the insert, so only translations
+    # whose history row exists go into the cache (not with store=false)
+    if rows and store:
+        try:
+            insert_translations(rows)
+        except Exception:
+            app.logger.exception('Batch translation storage failed')
+        else:
+            for key, translated_text in fresh.items():
+                translation_cache.set(key, translated_text)
+    return jsonify({"results": results})
 
 @app.route('/api/error', methods=['POST'])
 def log_error():
@@ -0,0 +1,114 @@
+"""Disk-quota'd store for generated TTS audio with LRU eviction.
+
+A file's mtime doubles as its last-access time (touch() bumps it, at most
+once per `touch_interval`), so the LRU order survives restarts without a
+separate index file. When the directory grows past `max_bytes`, the least
+recently used files are deleted, then `on_evict(filenames)` runs so the
+caller can drop database rows and memory-cache entries that point at
+them. The evicted entry then shows up as a cache miss, not a broken link.
+"""
+import os
+import re
+import threading
+import time
+
+# Content-addressed names written by tts_jobs.audio_filename (plus legacy tts_<n>_<lang>.mp3)
+SAFE_NAME = re.compile(r'^[A-Za-z0-9_\-]+\.mp3$')
+
+
+class AudioStore:
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, on_evict=None, touch_interval=60.0):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.on_evict = on_evict
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._files = {}  # name -> [size, last_access]
+        self._bytes = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+        os.makedirs(root, exist_ok=True)
+        self.rescan()
+
+    def rescan(self):
+        files = {}
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file() and SAFE_NAME.match(entry.name):
+                    st = entry.stat()
+                    files[entry.name] = [st.st_size, st.st_mtime]
+        with self._lock:
+            self._files = files
+            self._bytes = sum(size for size, _ in files.values())
+
+    def path(self, name):
+        """Absolute path for a stored file, or None for names that aren't ours."""
+        if not SAFE_NAME.match(name or ''):
+            return None
+        return os.path.join(self.root, name)
+
+    def exists(self, name):
+        path = self.path(name)
+        return path is not None and os.path.isfile(path)
+
+    def add(self, name):
+        """Register a newly written file and evict others if that broke the quota."""
+        path = self.path(name)
+        if path is None:
+            return
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._files.get(name)
+            self._bytes += size - (old[0] if old else 0)
+            self._files[name] = [size, time.time()]
+        self.enforce(keep=name)
+
+    def touch(self, name):
+        now = time.time()
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is None or now - entry[1] < self.touch_interval:
+                return
+            entry[1] = now
+        try:
+            os.utime(os.path.join(self.root, name), (now, now))
+        except OSError:
+            pass
+
+    def enforce(self, keep=None):
+        with self._lock:
+            if self._bytes <= self.max_bytes:
+                return []
+            victims = []
+            excess = self._bytes - self.max_bytes
+            for name, (size, _) in sorted(self._files.items(), key=lambda item: item[1][1]):
+                if excess <= 0:
+                    break
+                if name == keep:
+                    continue
+                victims.append(name)
+                excess -= size
+            for name in victims:
+                size, _ = self._files.pop(name)
+                self._bytes -= size
+                self.evicted += 1
+                self.evicted_bytes += size
+
+        for name in victims:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+        if victims and self.on_evict:
+            self.on_evict(victims)
+        return victims
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': len(self._files),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evicted_files': self.evicted,
+                'evicted_bytes': self.evicted_bytes,
+            }
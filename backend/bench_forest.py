@@ -0,0 +1,77 @@
+"""Parity check and latency benchmark: FlatForest vs model.predict.
+
+Usage: python bench_forest.py [--model model.p] [--data dataset|data.pickle] [--repeat 2000]
+
+Exits non-zero if the compiled forest disagrees with the original model on
+any row, so it can double as a regression check after retraining.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from fast_forest import FlatForest
+from features import NUM_FEATURES
+from dataset_store import DatasetReader, DATASET_DIR
+
+
+def time_per_call(fn, rows, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(rows[i % len(rows)])
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='./model.p')
+    parser.add_argument('--data', default=DATASET_DIR, help='dataset directory or legacy data.pickle')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    model = pickle.load(open(args.model, 'rb'))['model']
+    data_path = args.data
+    if data_path == DATASET_DIR and not os.path.isdir(data_path):
+        data_path = './data.pickle'
+    try:
+        if os.path.isdir(data_path):
+            X = np.asarray(DatasetReader(data_path).features)
+        else:
+            X = np.asarray(pickle.load(open(data_path, 'rb'))['data'], dtype=np.float32)
+    except FileNotFoundError:
+        print(f'{data_path} not found, using random rows')
+        X = np.random.default_rng(0).random((1000, NUM_FEATURES), dtype=np.float32)
+
+    fast = FlatForest.from_sklearn(model)
+
+    # --- Parity ---
+    # traverse_proba: predict_proba would hand this batch back to the model
+    expected_proba = model.predict_proba(X)
+    got_proba = fast.traverse_proba(X)
+    label_mismatches = int((model.predict(X) != fast.classes_[got_proba.argmax(axis=1)]).sum())
+    max_proba_diff = float(np.abs(expected_proba - got_proba).max())
+    print(f'parity: {len(X)} rows, {label_mismatches} label mismatches, max |proba diff| = {max_proba_diff:.2e}')
+
+    # --- Latency ---
+    rows = [x[np.newaxis, :] for x in X[:256]]
+    sk_single = time_per_call(model.predict, rows, args.repeat)
+    fast_single = time_per_call(fast.predict, rows, args.repeat)
+    print(f'single row : model.predict {sk_single:9.1f} us   FlatForest {fast_single:9.1f} us   ({sk_single / fast_single:.1f}x)')
+
+    batch_repeat = max(1, args.repeat // 100)
+    sk_batch = time_per_call(model.predict, [X], batch_repeat) / len(X)
+    walk_batch = time_per_call(fast.traverse_proba, [X], batch_repeat) / len(X)
+    fast_batch = time_per_call(fast.predict, [X], batch_repeat) / len(X)
+    print(f'batch/row  : model.predict {sk_batch:9.2f} us   FlatForest {fast_batch:9.2f} us   ({sk_batch / fast_batch:.1f}x)'
+          f'   [array walk alone {walk_batch:.2f} us]')
+
+    if label_mismatches or max_proba_diff > 1e-9:
+        print('FAILED: compiled forest does not match the original model')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
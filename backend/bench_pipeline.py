@@ -0,0 +1,180 @@
+"""Offline end-to-end benchmark of the recognition pipeline.
+
+Usage: python bench_pipeline.py --source video:clip.mp4 [--frames 500] [--output bench.json]
+
+Replays a frame source (see frame_sources.py: video file, ./data image tree
+or a recorded landmark trace) through the same stages the server runs and
+reports per-stage latency percentiles (decode, color, mediapipe, features,
+predict, draw, encode), end-to-end FPS, the hand detection rate and, when
+the source carries labels, accuracy. --output writes the same numbers as
+JSON so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from frame_sources import open_source, parse_source
+from inference import BatchedPredictor
+from model_store import ModelHolder, MODELS_DIR, DEFAULT_LABELS
+from pipeline import RecognitionPipeline, StageTimer, FrameResult, mp_hands
+from roi import ROITracker
+from video_stream import JpegEncoder
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def expected_text(label, labels):
+    # Image folders are named by class index ('0', '1', ...); traces may store either
+    if label is None:
+        return None
+    return labels.get(int(label), label) if str(label).isdigit() else label
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', default='images:./data',
+                        help='camera:0, video:<file>, images:<dir> or trace:<file.jsonl|.npy>')
+    parser.add_argument('--frames', type=int, default=0, help='stop after this many frames (0 = whole source)')
+    parser.add_argument('--warmup', type=int, default=10, help='frames run before timing starts')
+    parser.add_argument('--loop', action='store_true', help='restart the source when it ends')
+    parser.add_argument('--model', default='./model.p', help='legacy model, used when models/CURRENT is missing')
+    parser.add_argument('--fast-forest', action='store_true', help='serve forests through FlatForest')
+    parser.add_argument('--max-batch', type=int, default=int(os.environ.get('INFERENCE_MAX_BATCH', 32)),
+                        help='BatchedPredictor max batch size (INFERENCE_MAX_BATCH)')
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.environ.get('INFERENCE_MAX_WAIT_MS', 3)),
+                        help='BatchedPredictor batching window (INFERENCE_MAX_WAIT_MS)')
+    parser.add_argument('--direct', action='store_true',
+                        help='call the model directly instead of through BatchedPredictor as the server does')
+    parser.add_argument('--roi', action='store_true', help='enable ROI tracking (as ROI_TRACKING=1)')
+    parser.add_argument('--static', action='store_true',
+                        help='MediaPipe static_image_mode (sensible for unrelated images)')
+    parser.add_argument('--jpeg-quality', type=int, default=80)
+    parser.add_argument('--scale', type=float, default=1.0, help='resize before JPEG encoding (STREAM_SCALE)')
+    parser.add_argument('--no-draw', action='store_true', help='skip overlay drawing and encoding')
+    parser.add_argument('--record-trace', help='write detected landmarks as JSON lines for trace: replay')
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+
+    holder = ModelHolder(MODELS_DIR, legacy_path=args.model, fast_forest=args.fast_forest)
+    served = holder.load_initial()
+    if served is None:
+        print('No model in models/ or --model; classification is skipped')
+    labels = holder.labels if served else DEFAULT_LABELS
+
+    # Same front end as the server's capture worker, so 'predict' includes
+    # the batching thread's hand-off and any batching window
+    predictor = None
+    if args.direct:
+        def predict(features):
+            proba = served.predict_proba(features[np.newaxis, :])[0]
+            best = int(np.argmax(proba))
+            return served.classes_[best], float(proba[best])
+    else:
+        predictor = BatchedPredictor(served, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+        predict = predictor.predict
+
+    timer = StageTimer()
+    source = open_source(args.source, loop=args.loop)
+    is_trace = parse_source(args.source)[0] == 'trace'
+    hands = None if is_trace else mp_hands.Hands(static_image_mode=args.static,
+                                                 min_detection_confidence=0.5, max_num_hands=1)
+    pipeline = RecognitionPipeline(hands, predict, ROITracker(enabled=args.roi), timer)
+    encoder = JpegEncoder(quality=args.jpeg_quality, scale=args.scale)
+    trace = open(args.record_trace, 'w', encoding='utf-8') if args.record_trace else None
+
+    frames = detected = labelled = correct = 0
+    start = None
+    try:
+        while not args.frames or frames < args.frames:
+            if frames == args.warmup and start is None:
+                timer.samples.clear()
+                frames = detected = labelled = correct = 0
+                start = time.perf_counter()
+
+            read_start = time.perf_counter()
+            success, frame = source.read()
+            if not success:
+                break
+            timer.record('decode', time.perf_counter() - read_start)
+
+            if is_trace:
+                result = FrameResult(points=source.points)
+                if source.points is not None and served is not None:
+                    result.text, result.confidence = pipeline.classify(source.points)
+            else:
+                result = pipeline.process(frame, classify=served is not None)
+                if not args.no_draw:
+                    pipeline.draw(frame, result)
+                    with timer.stage('encode'):
+                        encoder.encode(frame)
+
+            frames += 1
+            detected += result.points is not None
+            want = expected_text(source.label, labels)
+            if want is not None and served is not None:
+                labelled += 1
+                correct += result.text == want
+            if trace:
+                trace.write(json.dumps({
+                    'points': None if result.points is None else np.round(result.points, 5).tolist(),
+                    'label': source.label,
+                }) + '\n')
+    finally:
+        source.release()
+        if trace:
+            trace.close()
+
+    if start is None:
+        print(f'Source ended during warm-up ({frames} frames); lower --warmup')
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'record_trace')},
+        'model': holder.info(),
+        'predictor': predictor.stats() if predictor else 'direct',
+        'frames': frames,
+        'elapsed_s': elapsed,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'detection_rate': detected / frames if frames else 0.0,
+        'accuracy': correct / labelled if labelled else None,
+        'stages': timer.summary(),
+    }
+
+    print(f"{frames} frames in {elapsed:.2f}s: {report['fps']:.1f} FPS end-to-end, "
+          f"hand found in {report['detection_rate'] * 100:.1f}%"
+          + (f", accuracy {report['accuracy'] * 100:.1f}% on {labelled} labelled frames" if labelled else ''))
+    print('predict: ' + ('model called directly (--direct), without the server\'s BatchedPredictor' if args.direct
+                         else f'through BatchedPredictor (max batch {args.max_batch}, window {args.max_wait_ms} ms)'))
+    print(f"{'stage':10s} {'count':>7s} {'mean':>8s} {'p50':>8s} {'p90':>8s} {'p99':>8s} {'max':>8s}  (ms)")
+    for name in ('decode', 'color', 'mediapipe', 'features', 'predict', 'draw', 'encode'):
+        s = report['stages'].get(name)
+        if s:
+            print(f"{name:10s} {s['count']:7d} {s['mean_ms']:8.3f} {s['p50_ms']:8.3f} "
+                  f"{s['p90_ms']:8.3f} {s['p99_ms']:8.3f} {s['max_ms']:8.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,50 +1,171 @@
+import argparse
 import os
 import pickle
+import time
+from multiprocessing import Pool
 
 import mediapipe as mp
 import cv2
-import matplotlib.pyplot as plt
+import numpy as np
 
+from features import landmarks_to_array, extract_features, NUM_FEATURES
+from landmark_cache import LandmarkCache, CACHE_PATH, settings_key
+from dataset_store import DatasetWriter, DATASET_DIR
 
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
 
-hands = mp_hands.Hands(static_image_mode=True, min_detection_confidence=0.3)
+mp_hands = mp.solutions.hands
 
 DATA_DIR = './data'
+PICKLE_PATH = 'data.pickle'
+MIN_DETECTION_CONFIDENCE = 0.3
+
+# Each worker process owns its own static-mode Hands instance
+hands = None
+
+
+def init_worker(min_detection_confidence):
+    global hands
+    hands = mp_hands.Hands(static_image_mode=True, min_detection_confidence=min_detection_confidence)
+
+
+def current_settings():
+    """Everything that changes what detect() returns; part of every cache key."""
+    return settings_key(
+        min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+        static_image_mode=True,
+        hand='first',
+        mediapipe=getattr(mp, '__version__', 'unknown'),
+    )
+
+
+def detect(img_path):
+    """(points, score) for the first hand in an image; points is a (21, 2) array or None."""
+    img = cv2.imread(img_path)
+    if img is None:
+        return None, None
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    results = hands.process(img_rgb)
+    if not results.multi_hand_landmarks:
+        return None, None
+    # Only the first hand is used, exactly like the live loop in app.py
+    score = results.multi_handedness[0].classification[0].score if results.multi_handedness else None
+    return landmarks_to_array(results.multi_hand_landmarks[0]), score
+
+
+def process_chunk(chunk):
+    return [(content_hash, rel_path) + detect(os.path.join(DATA_DIR, rel_path)) for content_hash, rel_path in chunk]
+
+
+def list_images(data_dir):
+    jobs = []
+    for dir_ in sorted(os.listdir(data_dir)):
+        class_dir = os.path.join(data_dir, dir_)
+        if not os.path.isdir(class_dir):
+            continue
+        for img_path in sorted(os.listdir(class_dir)):
+            jobs.append((os.path.join(dir_, img_path), dir_))
+    return jobs
+
+
+class Progress:
+    def __init__(self, total, already_done):
+        self.total = total
+        self.done = already_done
+        self.processed = 0
+        self.missed = 0
+        self.start = time.time()
+        self.last_report = 0.0
+
+    def update(self, results, force=False):
+        self.processed += len(results)
+        self.done += len(results)
+        self.missed += sum(1 for _, _, points, _ in results if points is None)
+        now = time.time()
+        if force or now - self.last_report >= 2.0:
+            self.last_report = now
+            elapsed = max(now - self.start, 1e-6)
+            miss_rate = self.missed / self.processed * 100 if self.processed else 0.0
+            print(f'{self.done}/{self.total} images | {self.processed / elapsed:.1f} img/s | '
+                  f'no hand detected: {miss_rate:.1f}%', flush=True)
+
+
+def build(workers, chunk_size, refresh, cache_path, output_dir=DATASET_DIR, write_pickle=False):
+    jobs = list_images(DATA_DIR)
+    settings = current_settings()
+    cache = LandmarkCache(cache_path)
+    try:
+        hashes = [cache.content_hash(os.path.join(DATA_DIR, rel_path)) for rel_path, _ in jobs]
+        cache.commit()
+        found = {} if refresh else cache.get_many(set(hashes), settings)
+
+        # Identical images (same hash) are only detected once
+        pending = {}
+        for content_hash, (rel_path, _) in zip(hashes, jobs):
+            if content_hash not in found:
+                pending.setdefault(content_hash, rel_path)
+        pending = list(pending.items())
+        print(f'{len(jobs)} images, {len(jobs) - len(pending)} from cache, {len(pending)} to process')
+
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        progress = Progress(len(jobs), len(jobs) - len(pending))
 
-data = []
-labels = []
-for dir_ in os.listdir(DATA_DIR):
-    for img_path in os.listdir(os.path.join(DATA_DIR, dir_)):
-        data_aux = []
+        def record(results):
+            # Committed per chunk, so an interrupted run resumes from the cache
+            cache.put_many([(h, rel_path, points, score) for h, rel_path, points, score in results], settings)
+            for h, _, points, score in results:
+                found[h] = (points, score)
+            progress.update(results)
 
-        x_ = []
-        y_ = []
+        if workers <= 1 or len(chunks) <= 1:
+            init_worker(MIN_DETECTION_CONFIDENCE)
+            for chunk in chunks:
+                record(process_chunk(chunk))
+        else:
+            with Pool(workers, initializer=init_worker, initargs=(MIN_DETECTION_CONFIDENCE,)) as pool:
+                for results in pool.imap_unordered(process_chunk, chunks):
+                    record(results)
+        progress.update([], force=True)
+    finally:
+        cache.close()
 
-        img = cv2.imread(os.path.join(DATA_DIR, dir_, img_path))
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    # Keep the on-disk image order, then one vectorized pass: (N, 21, 2) -> (N, 42)
+    points = []
+    labels = []
+    paths = []
+    scores = []
+    for content_hash, (rel_path, label) in zip(hashes, jobs):
+        hand, score = found[content_hash]
+        if hand is not None:
+            points.append(hand)
+            labels.append(label)
+            paths.append(rel_path)
+            scores.append(score)
+    data = extract_features(np.stack(points)) if points else np.empty((0, NUM_FEATURES), dtype=np.float32)
 
-        results = hands.process(img_rgb)
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                for i in range(len(hand_landmarks.landmark)):
-                    x = hand_landmarks.landmark[i].x
-                    y = hand_landmarks.landmark[i].y
+    writer = DatasetWriter(output_dir, overwrite=True)
+    writer.append(data, labels, paths, scores)
+    print(f'Wrote {len(labels)} samples to {output_dir}')
 
-                    x_.append(x)
-                    y_.append(y)
+    if write_pickle:
+        # Legacy format for older scripts
+        f = open(PICKLE_PATH, 'wb')
+        pickle.dump({'data': data.tolist(), 'labels': labels}, f)
+        f.close()
+        print(f'Wrote {len(labels)} samples to {PICKLE_PATH}')
 
-                for i in range(len(hand_landmarks.landmark)):
-                    x = hand_landmarks.landmark[i].x
-                    y = hand_landmarks.landmark[i].y
-                    data_aux.append(x - min(x_))
-                    data_aux.append(y - min(y_))
 
-            data.append(data_aux)
-            labels.append(dir_)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract hand landmarks from ./data into a columnar dataset')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes, each with its own MediaPipe Hands (1 = no pool)')
+    parser.add_argument('--chunk-size', type=int, default=32, help='images per task handed to a worker')
+    parser.add_argument('--refresh', action='store_true',
+                        help='ignore cached landmarks and run MediaPipe on every image again')
+    parser.add_argument('--cache', default=CACHE_PATH,
+                        help='landmark cache file (inspect/prune it with landmark_cache.py)')
+    parser.add_argument('--output', default=DATASET_DIR, help='dataset directory to write (see dataset_store.py)')
+    parser.add_argument('--pickle', action='store_true', help=f'also write the legacy {PICKLE_PATH}')
+    args = parser.parse_args()
 
-f = open('data.pickle', 'wb')
-pickle.dump({'data': data, 'labels': labels}, f)
-f.close()
+    build(max(1, args.workers), max(1, args.chunk_size), args.refresh, args.cache, args.output, args.pickle)
@@ -0,0 +1,158 @@
+"""Columnar on-disk dataset: memory-mappable, appendable, no pickle.
+
+A dataset is a directory:
+
+    meta.json      format version, row count, feature width, class names
+    features.f32   float32, rows x num_features, C order
+    labels.i32     int32 index into meta["classes"]
+    scores.f32     float32 hand-detection score (NaN if unknown)
+    paths.txt      source image path, one per line
+
+meta.json is rewritten (atomically) only after the column files have been
+appended to, so its row count is the commit point: bytes past it are from an
+interrupted append and are ignored by readers and truncated by the next writer.
+"""
+import json
+import os
+
+import numpy as np
+
+from features import NUM_FEATURES
+
+FORMAT_VERSION = 1
+DATASET_DIR = './dataset'
+
+_COLUMNS = {
+    'features': ('features.f32', np.float32),
+    'labels': ('labels.i32', np.int32),
+    'scores': ('scores.f32', np.float32),
+}
+
+
+def _read_meta(path):
+    with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported dataset format version {meta.get('version')}")
+    return meta
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, 'meta.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+
+class DatasetWriter:
+    """Create or append to a dataset directory."""
+
+    def __init__(self, path=DATASET_DIR, num_features=NUM_FEATURES, overwrite=False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if overwrite or not os.path.exists(os.path.join(path, 'meta.json')):
+            self.meta = {'version': FORMAT_VERSION, 'rows': 0, 'num_features': num_features, 'classes': []}
+            for name, _ in _COLUMNS.values():
+                open(os.path.join(path, name), 'wb').close()
+            open(os.path.join(path, 'paths.txt'), 'w', encoding='utf-8').close()
+            _write_meta(path, self.meta)
+        else:
+            self.meta = _read_meta(path)
+            if self.meta['num_features'] != num_features:
+                raise ValueError(f"{path} has {self.meta['num_features']} features per row, not {num_features}")
+            self._truncate_to_meta()
+
+    def _truncate_to_meta(self):
+        rows = self.meta['rows']
+        for key, (name, dtype) in _COLUMNS.items():
+            width = self.meta['num_features'] if key == 'features' else 1
+            with open(os.path.join(self.path, name), 'r+b') as f:
+                f.truncate(rows * width * np.dtype(dtype).itemsize)
+        paths_file = os.path.join(self.path, 'paths.txt')
+        with open(paths_file, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')[:rows]
+        with open(paths_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+
+    def class_index(self, name):
+        name = str(name)
+        classes = self.meta['classes']
+        if name not in classes:
+            classes.append(name)
+        return classes.index(name)
+
+    def append(self, features, class_names, paths, scores=None):
+        """Append rows. `class_names` are labels such as '0'..'24'; new ones are added to meta."""
+        features = np.ascontiguousarray(features, dtype=np.float32).reshape(-1, self.meta['num_features'])
+        n = features.shape[0]
+        if len(class_names) != n or len(paths) != n:
+            raise ValueError('features, class_names and paths must have the same number of rows')
+        labels = np.asarray([self.class_index(c) for c in class_names], dtype=np.int32)
+        scores = np.full(n, np.nan, dtype=np.float32) if scores is None else \
+            np.asarray([np.nan if s is None else s for s in scores], dtype=np.float32)
+
+        for key, column in (('features', features), ('labels', labels), ('scores', scores)):
+            with open(os.path.join(self.path, _COLUMNS[key][0]), 'ab') as f:
+                f.write(column.tobytes())
+        with open(os.path.join(self.path, 'paths.txt'), 'a', encoding='utf-8') as f:
+            f.write(''.join(str(p).replace('\n', ' ') + '\n' for p in paths))
+
+        self.meta['rows'] += n
+        _write_meta(self.path, self.meta)
+        return n
+
+
+class DatasetReader:
+    """Read-only, memory-mapped view of a dataset directory.
+
+    `features`, `labels` and `scores` are np.memmap arrays, so opening a
+    dataset costs nothing and slices only touch the pages they need.
+    """
+
+    def __init__(self, path=DATASET_DIR):
+        self.path = path
+        self.meta = _read_meta(path)
+        self.rows = self.meta['rows']
+        self.num_features = self.meta['num_features']
+        self.classes = np.asarray(self.meta['classes'])
+        self.features = self._map('features', (self.rows, self.num_features))
+        self.labels = self._map('labels', (self.rows,))
+        self.scores = self._map('scores', (self.rows,))
+        self._paths = None
+
+    def _map(self, key, shape):
+        name, dtype = _COLUMNS[key]
+        if self.rows == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def paths(self):
+        if self._paths is None:
+            with open(os.path.join(self.path, 'paths.txt'), 'r', encoding='utf-8') as f:
+                self._paths = f.read().split('\n')[:self.rows]
+        return self._paths
+
+    def class_names(self, labels=None):
+        """Class name for each label index (all rows by default)."""
+        return self.classes[self.labels if labels is None else labels]
+
+    def slice(self, start=0, stop=None):
+        """(X, y) for rows [start, stop) without copying."""
+        return self.features[start:stop], self.labels[start:stop]
+
+    def iter_batches(self, batch_size=1024, shuffle=False, seed=None):
+        """Yield (X, y) batches; shuffled batches gather rows in sorted order per batch."""
+        if not shuffle:
+            for start in range(0, self.rows, batch_size):
+                yield self.slice(start, start + batch_size)
+            return
+        order = np.random.default_rng(seed).permutation(self.rows)
+        for start in range(0, self.rows, batch_size):
+            idx = np.sort(order[start:start + batch_size])
+            yield self.features[idx], self.labels[idx]
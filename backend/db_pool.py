@@ -0,0 +1,197 @@
+"""Bounded MySQL connection pool.
+
+Routes keep their existing `conn = get_db_connection() ... conn.close()`
+shape: the connection they get is a PooledConnection whose close() hands
+the underlying connection back to the pool instead of closing the socket.
+
+- At most `size` connections exist; get() waits up to `timeout` seconds for
+  one to come back and then raises PoolTimeout.
+- Connections idle for longer than `idle_check` seconds are pinged before
+  they are handed out and replaced if the server dropped them.
+- If the server needs the mysql_native_password fallback, the pool
+  remembers that after the first success and never repeats the failing
+  attempt.
+"""
+import collections
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errors
+
+NATIVE_PASSWORD = 'mysql_native_password'
+
+
+class PoolTimeout(errors.PoolError):
+    pass
+
+
+def _is_auth_plugin_error(exc):
+    msg = str(exc).lower()
+    return 'caching_sha2_password' in msg or 'auth plugin' in msg
+
+
+class PooledConnection:
+    """Proxy for a pooled connection; close() returns it to the pool (and is idempotent)."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._broken = False
+
+    @property
+    def released(self):
+        return self._conn is None
+
+    def mark_broken(self):
+        """Close the connection on release instead of reusing it."""
+        self._broken = True
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool._release(conn, self._broken)
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise errors.OperationalError('connection was already returned to the pool')
+        return getattr(conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if isinstance(exc, (errors.InterfaceError, errors.OperationalError)):
+            self._broken = True
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, config, size=8, timeout=5.0, idle_check=30.0, on_connect=None):
+        self.config = dict(config)
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.idle_check = idle_check
+        # Called with the seconds each new physical connection took
+        self.on_connect = on_connect
+        self.auth_plugin = self.config.get('auth_plugin')
+        self._idle = collections.deque()  # (conn, returned_at)
+        self._cond = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self.created = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+
+    def _connect(self):
+        start = time.perf_counter()
+        cfg = dict(self.config)
+        if self.auth_plugin:
+            cfg['auth_plugin'] = self.auth_plugin
+            conn = mysql.connector.connect(**cfg)
+        else:
+            try:
+                conn = mysql.connector.connect(**cfg)
+            except mysql.connector.Error as e:
+                # Some MySQL 8 servers default to caching_sha2_password; retry
+                # once with the older plugin and stick with it if that works
+                if not _is_auth_plugin_error(e):
+                    raise
+                cfg['auth_plugin'] = NATIVE_PASSWORD
+                conn = mysql.connector.connect(**cfg)
+                self.auth_plugin = NATIVE_PASSWORD
+        self.created += 1
+        if self.on_connect:
+            self.on_connect(time.perf_counter() - start)
+        return conn
+
+    def get(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._idle or self._open < self.size, timeout):
+                self.timeouts += 1
+                raise PoolTimeout(f'no MySQL connection available within {timeout}s (pool size {self.size})')
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+            else:
+                conn, returned_at = None, None
+                self._open += 1
+            self._in_use += 1
+            self.checkouts += 1
+            self.wait_seconds += time.perf_counter() - start
+
+        # Network work happens outside the lock
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - returned_at > self.idle_check:
+                conn = self._check(conn)
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, conn)
+
+    def _check(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Exception:
+            self.reconnects += 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return self._connect()
+
+    def _release(self, conn, broken=False):
+        if not broken:
+            try:
+                # Don't hand the next borrower someone else's open transaction
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._in_use -= 1
+            if broken:
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._open -= len(idle)
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self.created,
+                'reconnects': self.reconnects,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'mean_wait_ms': self.wait_seconds * 1000.0 / self.checkouts if self.checkouts else 0.0,
+                'auth_plugin': self.auth_plugin or 'default',
+            }
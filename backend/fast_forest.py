@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+
+class FlatForest:
+    """A fitted RandomForestClassifier flattened into plain NumPy node arrays.
+
+    All trees are concatenated into one set of arrays (feature, threshold,
+    left/right child, per-node class probabilities). Prediction walks every
+    tree for every row at once, one depth level per step, with no sklearn
+    code in the loop. Leaves point at themselves, so rows that reach a leaf
+    early stay there until the deepest tree finishes.
+
+    Outputs match the source forest: thresholds are compared exactly like
+    sklearn does (float32 input against float64 thresholds, `<=` goes left),
+    and probabilities are the mean of each tree's normalized leaf values.
+
+    The level-by-level walk wins on single rows (no per-call sklearn
+    overhead) but loses on batches, where it visits max_depth levels for
+    every row and tree while sklearn stops at each leaf in C. So
+    predict_proba hands batches of more than one row to the original
+    estimator when one is available: `fallback`, or `fallback_loader()`
+    called on first use (artifacts loaded from arrays only read
+    model.joblib if a batch ever arrives).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes,
+                 fallback=None, fallback_loader=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.fallback = fallback
+        self.fallback_loader = fallback_loader
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            ids = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, ids, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, ids, tree.children_right).astype(np.int32) + offset)
+
+            # Single-output classifier: value is (n_nodes, 1, n_classes)
+            counts = tree.value[:, 0, :].astype(np.float64)
+            totals = counts.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(counts / totals)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            fallback=forest,
+        )
+
+    _ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes_')
+
+    def save(self, directory):
+        """Write each array as its own .npy file so `load` can memory-map them."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            if array.dtype == object:
+                # e.g. string class labels; .npy can't store objects without pickle
+                array = array.astype(str)
+            np.save(os.path.join(directory, name.rstrip('_') + '.npy'), array, allow_pickle=False)
+        with open(os.path.join(directory, 'max_depth.txt'), 'w') as f:
+            f.write(str(self.max_depth))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r', fallback_loader=None):
+        arrays = {name: np.load(os.path.join(directory, name.rstrip('_') + '.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in cls._ARRAYS}
+        with open(os.path.join(directory, 'max_depth.txt'), 'r') as f:
+            max_depth = int(f.read().strip())
+        return cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'], arrays['value'],
+                   arrays['roots'], max_depth, arrays['classes_'], fallback_loader=fallback_loader)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Leaf node index reached in every tree: (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def traverse_proba(self, X):
+        """Class probabilities from the flat arrays, whatever the batch size."""
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 2 and X.shape[0] > 1:
+            if self.fallback is None and self.fallback_loader is not None:
+                self.fallback = self.fallback_loader()
+            if self.fallback is not None:
+                return self.fallback.predict_proba(X)
+        return self.traverse_proba(X)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def compile_model(model):
+    """Return a FlatForest for forest models, or the model unchanged if it can't be flattened."""
+    estimators = getattr(model, 'estimators_', None)
+    if not isinstance(estimators, list) or not estimators or not all(hasattr(e, 'tree_') for e in estimators):
+        return model
+    if getattr(model, 'n_outputs_', 1) != 1:
+        return model
+    return FlatForest.from_sklearn(model)
@@ -0,0 +1,35 @@
+import numpy as np
+
+# MediaPipe Hands always returns 21 landmarks per hand; the classifier is
+# trained on their (x, y) coordinates, shifted so the hand's top-left corner
+# is the origin.
+NUM_LANDMARKS = 21
+NUM_FEATURES = NUM_LANDMARKS * 2
+
+
+def landmarks_to_array(hand_landmarks):
+    """Copy a MediaPipe hand's normalized (x, y) coordinates into a (21, 2) float32 array."""
+    return np.array([(lm.x, lm.y) for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+def extract_features(points):
+    """Turn landmark points into classifier features in one vectorized pass.
+
+    `points` is either a single hand of shape (21, 2) or a batch of hands of
+    shape (N, 21, 2). Returns a float32 array of shape (42,) or (N, 42) laid
+    out as x0, y0, x1, y1, ... - the same order create_dataset.py has always
+    written, so train and serve features match.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    if points.shape[-2:] != (NUM_LANDMARKS, 2):
+        raise ValueError(f"expected (..., {NUM_LANDMARKS}, 2) landmarks, got {points.shape}")
+    shifted = points - points.min(axis=-2, keepdims=True)
+    return shifted.reshape(points.shape[:-2] + (NUM_FEATURES,))
+
+
+def hand_bbox(points, width, height, pad=10):
+    """Pixel bounding box (x1, y1, x2, y2) around a (21, 2) landmark array."""
+    mins = points.min(axis=0)
+    maxs = points.max(axis=0)
+    return (int(mins[0] * width) - pad, int(mins[1] * height) - pad,
+            int(maxs[0] * width) + pad, int(maxs[1] * height) + pad)
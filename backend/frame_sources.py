@@ -0,0 +1,195 @@
+"""Pluggable frame sources for the capture worker and bench_pipeline.py.
+
+Every source has the cv2.VideoCapture-style interface the capture loop
+already uses: read() -> (success, frame), grab() and release(). Replay
+sources also expose `label` (ground-truth class of the last frame, if known)
+and landmark traces expose `points` instead of an image.
+
+open_source() takes a spec string:
+    camera:0            live webcam (the default)
+    video:clip.mp4      a recorded video file
+    images:./data       ./data/<class>/*.jpg, labelled by folder
+    trace:hand.jsonl    recorded landmark traces (see LandmarkTraceSource)
+A bare path is recognised by its extension or by being a directory.
+"""
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from features import NUM_LANDMARKS
+from video_stream import configure_capture
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+class CameraSource:
+    def __init__(self, index=0, **capture_options):
+        self.cap = configure_capture(cv2.VideoCapture(index), **capture_options)
+        self.label = None
+        self.points = None
+
+    def read(self):
+        return self.cap.read()
+
+    def grab(self):
+        return self.cap.grab()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource:
+    """Replays a video file; with `realtime` it is paced at the file's own FPS like a camera."""
+
+    def __init__(self, path, loop=False, realtime=False):
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f'cannot open video {path}')
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.period = 1.0 / fps
+        self._next_due = None
+        self.label = None
+        self.points = None
+
+    def read(self):
+        if self.realtime:
+            now = time.perf_counter()
+            if self._next_due is not None and now < self._next_due:
+                time.sleep(self._next_due - now)
+            self._next_due = max(now, self._next_due or now) + self.period
+        success, frame = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        return success, frame
+
+    def grab(self):
+        return self.cap.grab()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource:
+    """Images from a directory; in the ./data/<class>/ layout `label` is the class folder."""
+
+    def __init__(self, root, loop=False):
+        self.files = []
+        for dirpath, _, names in sorted(os.walk(root)):
+            for name in sorted(names):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(dirpath, name)
+                    rel_dir = os.path.relpath(dirpath, root)
+                    self.files.append((path, None if rel_dir == '.' else rel_dir.split(os.sep)[0]))
+        if not self.files:
+            raise FileNotFoundError(f'no images under {root}')
+        self.loop = loop
+        self.index = 0
+        self.label = None
+        self.points = None
+
+    def _next(self):
+        if self.index >= len(self.files):
+            if not self.loop:
+                return None
+            self.index = 0
+        item = self.files[self.index]
+        self.index += 1
+        return item
+
+    def read(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return False, None
+            path, self.label = item
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, frame
+
+    def grab(self):
+        return self._next() is not None
+
+    def release(self):
+        pass
+
+
+class LandmarkTraceSource:
+    """Recorded landmarks, for benchmarking everything after MediaPipe.
+
+    Accepts .npy of shape (N, 21, 2) or JSON lines of
+    {"points": [[x, y] * 21] or null, "label": "3"} as written by
+    bench_pipeline.py --record-trace. read() returns (True, None) and puts
+    the landmarks in `points`.
+    """
+
+    def __init__(self, path, loop=False):
+        if path.endswith('.npy'):
+            arr = np.load(path).astype(np.float32)
+            self.records = [(p, None) for p in arr.reshape(-1, NUM_LANDMARKS, 2)]
+        else:
+            self.records = []
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    points = rec.get('points')
+                    self.records.append((None if points is None else np.asarray(points, dtype=np.float32),
+                                         rec.get('label')))
+        self.loop = loop
+        self.index = 0
+        self.label = None
+        self.points = None
+
+    def read(self):
+        if self.index >= len(self.records):
+            if not self.loop or not self.records:
+                return False, None
+            self.index = 0
+        self.points, self.label = self.records[self.index]
+        self.index += 1
+        return True, None
+
+    def grab(self):
+        success, _ = self.read()
+        return success
+
+    def release(self):
+        pass
+
+
+def parse_source(spec):
+    """(kind, target) for a source spec: 'camera', 'video', 'images' or 'trace'."""
+    kind, _, target = spec.partition(':') if ':' in spec and spec.split(':', 1)[0] in (
+        'camera', 'video', 'images', 'trace') else ('', '', spec)
+    if not kind:
+        if spec.isdigit():
+            kind = 'camera'
+        elif os.path.isdir(spec):
+            kind = 'images'
+        elif spec.lower().endswith(VIDEO_EXTENSIONS):
+            kind = 'video'
+        elif spec.lower().endswith(('.npy', '.jsonl')):
+            kind = 'trace'
+        else:
+            raise ValueError(f'cannot tell what kind of frame source {spec!r} is')
+    return kind, target
+
+
+def open_source(spec, loop=False, realtime=False, **capture_options):
+    kind, target = parse_source(spec)
+    if kind == 'camera':
+        return CameraSource(int(target or 0), **capture_options)
+    if kind == 'video':
+        return VideoFileSource(target, loop=loop, realtime=realtime)
+    if kind == 'images':
+        return ImageDirSource(target, loop=loop)
+    return LandmarkTraceSource(target, loop=loop)
@@ -0,0 +1,78 @@
+import threading
+import time
+
+# Socket.IO room of the clients subscribed to recognized letters
+RECOGNITION_ROOM = 'recognition'
+
+
+class GestureDebouncer:
+    """Confirms a letter once it has been predicted continuously for long enough.
+
+    A letter is confirmed after being predicted for `hold_seconds` without
+    a different prediction in between, and at most once every `cooldown`
+    seconds. Holding is measured in time rather than frames, so the
+    confirmation delay doesn't stretch when the frame scheduler runs
+    inference less often. A gap of more than `max_gap` seconds between
+    predictions (the hand left the frame) starts the hold over; callers
+    that know how often inference runs pass a larger `max_gap` to update()
+    so a slowed-down scheduler isn't mistaken for a missing hand.
+    """
+
+    def __init__(self, hold_seconds=0.5, cooldown=1.0, max_gap=None):
+        self.hold_seconds = hold_seconds
+        self.cooldown = cooldown
+        self.max_gap = max(hold_seconds, 0.25) if max_gap is None else max_gap
+        self.last_predicted_char = ""
+        self.held_since = 0.0
+        self.last_seen = 0.0
+        self.last_add_time = 0
+
+    def update(self, predicted_char, now=None, max_gap=None):
+        """Feed one prediction; returns the confirmed letter or None."""
+        now = time.time() if now is None else now
+        gap = self.max_gap if max_gap is None else max(self.max_gap, max_gap)
+        if predicted_char != self.last_predicted_char or now - self.last_seen > gap:
+            self.last_predicted_char = predicted_char
+            self.held_since = now
+        self.last_seen = now
+
+        if now - self.held_since >= self.hold_seconds:
+            if now - self.last_add_time > self.cooldown:
+                self.last_add_time = now
+                self.held_since = now
+                return predicted_char
+        return None
+
+
+class GestureSessions:
+    """Letter confirmation for the shared camera stream and the clients receiving it.
+
+    There is one camera, so there is one GestureDebouncer: every prediction
+    is counted once and each confirmed letter is broadcast once to all
+    registered sids, instead of keeping an identical copy of the debounce
+    state per client.
+    """
+
+    def __init__(self, hold_seconds=0.5, cooldown=1.0):
+        self.debouncer = GestureDebouncer(hold_seconds, cooldown)
+        self._lock = threading.Lock()
+        self._sids = set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sids)
+
+    def add(self, sid):
+        with self._lock:
+            self._sids.add(sid)
+
+    def remove(self, sid):
+        with self._lock:
+            self._sids.discard(sid)
+
+    def update(self, predicted_char, now=None, max_gap=None):
+        """Feed one prediction from the camera stream; returns the confirmed letter or None."""
+        with self._lock:
+            if not self._sids:
+                return None
+            return self.debouncer.update(predicted_char, now, max_gap)
@@ -0,0 +1,139 @@
+"""Streaming export of one owner's full history as NDJSON or CSV.
+
+Rows are read from unbuffered (server-side) cursors in fetchmany batches
+and written out as they arrive, so memory stays flat however large the
+history is. Home and chatbot sessions are joined with their messages in a
+single ordered query per kind; consecutive rows of a session are folded
+into one NDJSON record (or written as one CSV line per message).
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+FETCH_SIZE = 500
+
+# Columns of the CSV output; NDJSON records use the same names
+CSV_FIELDS = ('record_type', 'session_id', 'title', 'session_started_at', 'item_id', 'sender',
+              'input_text', 'output_text', 'language_id', 'source_language_id', 'target_language_id',
+              'voice', 'audio_path', 'created_at')
+
+SESSION_KINDS = {
+    # kind: sessions LEFT JOINed with their messages, in session then message order
+    'home': """
+        SELECT s.home_session_id AS session_id, s.title AS title, s.started_at AS session_started_at,
+               m.home_message_id AS item_id, m.sender AS sender, m.input_text AS input_text,
+               m.translated_text AS output_text, m.created_at AS created_at
+        FROM home_sessions s
+        LEFT JOIN home_messages m ON m.home_session_id = s.home_session_id
+        WHERE {owner} AND (%s IS NULL OR s.started_at >= %s OR m.created_at >= %s)
+        ORDER BY s.started_at, s.home_session_id, m.created_at, m.home_message_id
+    """,
+    'chatbot': """
+        SELECT s.chatbot_session_id AS session_id, NULL AS title, s.started_at AS session_started_at,
+               m.message_id AS item_id, m.sender AS sender, m.input_text AS input_text,
+               m.output_text AS output_text, m.language_id AS language_id, m.created_at AS created_at
+        FROM chatbot_sessions s
+        LEFT JOIN chatbot_messages m ON m.chatbot_session_id = s.chatbot_session_id
+        WHERE {owner} AND (%s IS NULL OR s.started_at >= %s OR m.created_at >= %s)
+        ORDER BY s.started_at, s.chatbot_session_id, m.created_at, m.message_id
+    """,
+}
+
+FLAT_KINDS = {
+    'translation': """
+        SELECT translation_id AS item_id, input_text, output_text, source_language_id, target_language_id, created_at
+        FROM translation_sessions
+        WHERE {owner} AND (%s IS NULL OR created_at >= %s)
+        ORDER BY created_at, translation_id
+    """,
+    'tts': """
+        SELECT tts_id AS item_id, input_text, language_id, voice, audio_path, created_at
+        FROM tts_sessions
+        WHERE {owner} AND (%s IS NULL OR created_at >= %s)
+        ORDER BY created_at, tts_id
+    """,
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _rows(cursor, query, params):
+    cursor.execute(query, params)
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def iter_records(conn, owner_column, owner_value, since=None, kinds=('home', 'chatbot', 'translation', 'tts')):
+    """Yield flat dict records (one per message / translation / tts row).
+
+    Each query's result is drained before the next one starts, as an
+    unbuffered MySQL connection requires. Sessions without messages yield a
+    single record with empty message fields.
+    """
+    owner = f's.{owner_column} = %s'
+    for kind in kinds:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        try:
+            if kind in SESSION_KINDS:
+                query = SESSION_KINDS[kind].format(owner=owner)
+                for row in _rows(cursor, query, (owner_value, since, since, since)):
+                    row['record_type'] = f'{kind}_message'
+                    yield row
+            elif kind in FLAT_KINDS:
+                query = FLAT_KINDS[kind].format(owner=f'{owner_column} = %s')
+                for row in _rows(cursor, query, (owner_value, since, since)):
+                    row['record_type'] = kind
+                    yield row
+        finally:
+            cursor.close()
+
+
+def ndjson_lines(records):
+    """One JSON object per line; a session's messages are folded into it."""
+    session = None
+    for record in records:
+        if record['record_type'].endswith('_message'):
+            kind = record['record_type'][:-len('_message')]
+            key = (kind, record['session_id'])
+            if session is None or session['_key'] != key:
+                if session is not None:
+                    yield _dump_session(session)
+                session = {'_key': key, 'record_type': f'{kind}_session', 'session_id': record['session_id'],
+                           'title': record.get('title'), 'started_at': record['session_started_at'], 'messages': []}
+            if record.get('item_id') is not None:
+                session['messages'].append({k: record.get(k) for k in
+                                            ('item_id', 'sender', 'input_text', 'output_text', 'language_id', 'created_at')
+                                            if record.get(k) is not None})
+            continue
+        if session is not None:
+            yield _dump_session(session)
+            session = None
+        yield json.dumps(record, default=_json_default, ensure_ascii=False) + '\n'
+    if session is not None:
+        yield _dump_session(session)
+
+
+def _dump_session(session):
+    session = dict(session)
+    del session['_key']
+    return json.dumps(session, default=_json_default, ensure_ascii=False) + '\n'
+
+
+def csv_lines(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+    for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow({k: (v.isoformat() if isinstance(v, (datetime, date)) else v) for k, v in record.items()})
+        yield buffer.getvalue()
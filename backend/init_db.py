@@ -1,6 +1,8 @@
 import mysql.connector
 import os
 
+from text_keys import text_hash
+
 # Use the same DB config as app.py; update if needed
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST', 'localhost'),
@@ -11,6 +13,59 @@ DB_CONFIG = {
 
 DDL_PATH = os.path.join(os.path.dirname(__file__), '..', 'DDL.sql')
 
+# Applied after DDL.sql for databases created before these columns/indexes
+# existed. Each statement is best-effort: "duplicate column/key" just means
+# it already ran.
+MIGRATIONS = [
+    "ALTER TABLE tts_sessions MODIFY user_id INT NULL",
+    "ALTER TABLE translation_sessions MODIFY user_id INT NULL",
+    "ALTER TABLE tts_sessions ADD COLUMN client_token VARCHAR(255) NULL",
+    "ALTER TABLE translation_sessions ADD COLUMN client_token VARCHAR(255) NULL",
+    "ALTER TABLE tts_sessions ADD COLUMN input_hash CHAR(64) NULL AFTER input_text",
+    "ALTER TABLE translation_sessions ADD COLUMN input_hash CHAR(64) NULL AFTER input_text",
+    "CREATE INDEX idx_tts_lookup ON tts_sessions (input_hash, language_id, voice)",
+    "CREATE INDEX idx_tts_user ON tts_sessions (user_id, created_at)",
+    "CREATE INDEX idx_tts_client ON tts_sessions (client_token, created_at)",
+    "CREATE INDEX idx_translation_lookup ON translation_sessions (input_hash, source_language_id, target_language_id)",
+    "CREATE INDEX idx_translation_user ON translation_sessions (user_id, created_at)",
+    "CREATE INDEX idx_translation_client ON translation_sessions (client_token, created_at)",
+    # Keyset pagination: (owner, timestamp) so each page is an index range scan
+    # (InnoDB appends the primary key, which breaks ties)
+    "CREATE INDEX idx_chatbot_sessions_user ON chatbot_sessions (user_id, started_at)",
+    "CREATE INDEX idx_chatbot_sessions_client ON chatbot_sessions (client_token, started_at)",
+    "CREATE INDEX idx_home_sessions_user ON home_sessions (user_id, started_at)",
+    "CREATE INDEX idx_home_sessions_client ON home_sessions (client_token, started_at)",
+    "CREATE INDEX idx_home_messages_session ON home_messages (home_session_id, created_at)",
+    "CREATE INDEX idx_tts_created ON tts_sessions (created_at)",
+    "CREATE INDEX idx_translation_created ON translation_sessions (created_at)",
+]
+
+# (table, primary key) pairs whose input_hash is computed from input_text
+HASHED_TABLES = [('tts_sessions', 'tts_id'), ('translation_sessions', 'translation_id')]
+
+
+def backfill_input_hashes(cursor, batch_size=1000):
+    """Fill input_hash for rows written before the column existed.
+
+    Hashing happens in Python (text_keys.text_hash) so old rows get exactly
+    the key the app computes for new ones.
+    """
+    for table, key in HASHED_TABLES:
+        total = 0
+        last_id = 0
+        while True:
+            cursor.execute(
+                f"SELECT {key}, input_text FROM {table} WHERE input_hash IS NULL AND {key} > %s ORDER BY {key} LIMIT %s",
+                (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(f"UPDATE {table} SET input_hash = %s WHERE {key} = %s",
+                               [(text_hash(text), row_id) for row_id, text in rows])
+            last_id = rows[-1][0]
+            total += len(rows)
+        print(f'Backfilled input_hash for {total} {table} rows')
+
 
 def apply_ddl():
     print('Connecting to database...')
@@ -55,6 +110,16 @@ def apply_ddl():
         # column likely exists or DB doesn't support ALTER in this context; ignore
         print('Could not add context column (may already exist):', e)
 
+    for stmt in MIGRATIONS:
+        try:
+            cursor.execute(stmt)
+        except Exception as e:
+            print('Migration skipped:', stmt[:80], '-', e)
+    try:
+        backfill_input_hashes(cursor)
+    except Exception as e:
+        print('input_hash backfill failed:', e)
+
     cursor.close()
     conn.close()
     print('DDL applied (best-effort).')
@@ -0,0 +1,182 @@
+"""Persistent cache of hand landmarks extracted from dataset images.
+
+Rows are keyed by the SHA-256 of the image bytes plus the extractor settings
+(min_detection_confidence, MediaPipe version, ...), so create_dataset.py only
+runs MediaPipe on images that are new, changed, or were processed with other
+settings. A second table remembers (path, size, mtime) -> hash so unchanged
+files are not even re-read.
+
+Usage:
+    python landmark_cache.py stats
+    python landmark_cache.py prune [--missing] [--other-settings] [--older-than DAYS]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from features import NUM_LANDMARKS
+
+CACHE_PATH = 'landmark_cache.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS landmarks (
+    content_hash TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    points BLOB,            -- float32 (21, 2); NULL when no hand was found
+    score REAL,             -- MediaPipe handedness score of the first hand
+    path TEXT,              -- last path this content was seen at
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (content_hash, settings)
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+
+def settings_key(**settings):
+    """Stable string for the extractor settings that affect the landmarks."""
+    return json.dumps(settings, sort_keys=True)
+
+
+def hash_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LandmarkCache:
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def content_hash(self, path):
+        """Hash of a file, reusing the stored one if size and mtime are unchanged."""
+        st = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime_ns, content_hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        content_hash = hash_file(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, content_hash))
+        return content_hash
+
+    def get_many(self, hashes, settings):
+        """{content_hash: (points or None, score)} for the hashes that are cached."""
+        found = {}
+        hashes = list(hashes)
+        now = time.time()
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            marks = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT content_hash, points, score FROM landmarks WHERE settings = ? AND content_hash IN ({marks})",
+                [settings] + batch).fetchall()
+            for content_hash, blob, score in rows:
+                points = None if blob is None else np.frombuffer(blob, dtype=np.float32).reshape(NUM_LANDMARKS, 2)
+                found[content_hash] = (points, score)
+            self.conn.execute(
+                f"UPDATE landmarks SET last_used = ? WHERE settings = ? AND content_hash IN ({marks})",
+                [now, settings] + batch)
+        return found
+
+    def put_many(self, records, settings):
+        """Store [(content_hash, path, points or None, score)] and commit."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO landmarks (content_hash, settings, points, score, path, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(h, settings, None if p is None else np.asarray(p, dtype=np.float32).tobytes(), s, path, now, now)
+             for h, path, p, s in records])
+        self.commit()
+
+    def commit(self):
+        self.conn.commit()
+
+    def stats(self):
+        total, misses = self.conn.execute(
+            "SELECT COUNT(*), SUM(points IS NULL) FROM landmarks").fetchone()
+        per_settings = self.conn.execute(
+            "SELECT settings, COUNT(*), MIN(created_at), MAX(last_used) FROM landmarks GROUP BY settings").fetchall()
+        files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {
+            'path': self.path,
+            'size_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'entries': total,
+            'no_hand_entries': misses or 0,
+            'tracked_files': files,
+            'settings': [{'settings': s, 'entries': n, 'oldest': created, 'last_used': used}
+                         for s, n, created, used in per_settings],
+        }
+
+    def prune(self, keep_settings=None, keep_hashes=None, older_than=None):
+        """Delete entries for other settings, hashes not in `keep_hashes`, or unused since `older_than` (epoch)."""
+        removed = 0
+        if keep_settings is not None:
+            removed += self.conn.execute("DELETE FROM landmarks WHERE settings != ?", (keep_settings,)).rowcount
+        if older_than is not None:
+            removed += self.conn.execute("DELETE FROM landmarks WHERE last_used < ?", (older_than,)).rowcount
+        if keep_hashes is not None:
+            keep = set(keep_hashes)
+            stale = [(h,) for (h,) in self.conn.execute("SELECT DISTINCT content_hash FROM landmarks") if h not in keep]
+            removed += self.conn.executemany("DELETE FROM landmarks WHERE content_hash = ?", stale).rowcount
+            self.conn.execute(
+                "DELETE FROM files WHERE content_hash NOT IN (SELECT content_hash FROM landmarks)")
+        self.commit()
+        self.conn.execute("VACUUM")
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or prune the landmark cache used by create_dataset.py')
+    parser.add_argument('--cache', default=CACHE_PATH)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='show entry counts per extractor setting')
+    prune = sub.add_parser('prune', help='delete unneeded entries')
+    prune.add_argument('--missing', action='store_true', help='drop entries for images no longer under --data')
+    prune.add_argument('--data', default='./data')
+    prune.add_argument('--other-settings', action='store_true',
+                       help="drop entries made with settings other than create_dataset.py's current ones")
+    prune.add_argument('--older-than', type=float, metavar='DAYS', help='drop entries not used for DAYS days')
+    args = parser.parse_args()
+
+    cache = LandmarkCache(args.cache)
+    try:
+        if args.command == 'stats':
+            print(json.dumps(cache.stats(), indent=2))
+            return
+
+        keep_settings = None
+        if args.other_settings:
+            # Imported here: pulls in MediaPipe, which `stats` doesn't need
+            from create_dataset import current_settings
+            keep_settings = current_settings()
+        keep_hashes = None
+        if args.missing:
+            keep_hashes = [cache.content_hash(os.path.join(root, name))
+                           for root, _, names in os.walk(args.data) for name in names]
+        older_than = time.time() - args.older_than * 86400 if args.older_than is not None else None
+        removed = cache.prune(keep_settings, keep_hashes, older_than)
+        print(f'Removed {removed} entries')
+    finally:
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import struct
+import threading
+
+import numpy as np
+
+from features import NUM_LANDMARKS
+
+# Binary 'landmarks' Socket.IO event, little-endian (91 bytes with a hand):
+#   uint8   version (1)
+#   uint8   flags      bit 0 = hand present
+#   uint16  seq        wraps at 65535
+#   uint8   label      class index, 255 = no prediction
+#   float16 confidence
+#   float16[21 * 2]    x0, y0, x1, y1, ... normalized to the camera frame
+#                      (only present when a hand is detected)
+# The browser decodes it in src/services/landmarkStream.js.
+FORMAT_VERSION = 1
+NO_LABEL = 255
+HEADER = struct.Struct('<BBHBe')
+LANDMARK_ROOM = 'landmarks'
+
+
+def pack_landmark_frame(seq, points=None, label=None, confidence=0.0):
+    flags = 1 if points is not None else 0
+    label = NO_LABEL if label is None else int(label)
+    header = HEADER.pack(FORMAT_VERSION, flags, seq & 0xFFFF, label, float(confidence))
+    if points is None:
+        return header
+    return header + np.asarray(points, dtype='<f2').reshape(NUM_LANDMARKS * 2).tobytes()
+
+
+def unpack_landmark_frame(payload):
+    """Inverse of pack_landmark_frame -> (seq, points or None, label or None, confidence)."""
+    version, flags, seq, label, confidence = HEADER.unpack_from(payload)
+    if version != FORMAT_VERSION:
+        raise ValueError(f'unsupported landmark frame version {version}')
+    points = None
+    if flags & 1:
+        points = np.frombuffer(payload, dtype='<f2', count=NUM_LANDMARKS * 2, offset=HEADER.size)
+        points = points.astype(np.float32).reshape(NUM_LANDMARKS, 2)
+    return seq, points, (None if label == NO_LABEL else label), float(confidence)
+
+
+class LandmarkSubscribers:
+    """Socket.IO sids that asked for the landmark stream instead of (or besides) MJPEG."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sids = set()
+        self._seq = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sids)
+
+    def add(self, sid):
+        with self._lock:
+            self._sids.add(sid)
+
+    def discard(self, sid):
+        with self._lock:
+            self._sids.discard(sid)
+
+    def next_seq(self):
+        with self._lock:
+            self._seq = (self._seq + 1) & 0xFFFF
+            return self._seq
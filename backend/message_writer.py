@@ -0,0 +1,233 @@
+"""Bulk and write-behind inserts for chatbot and home messages.
+
+insert_messages() writes any number of messages in one transaction with
+one executemany per table (mysql.connector turns that into multi-row
+INSERT ... VALUES statements). WriteBehindBuffer collects single-message
+posts and flushes them through the same path every `flush_interval`
+seconds or once `max_rows` are waiting, and flushes whatever is left when
+the process exits.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from mysql.connector import errors
+
+# kind -> (table, columns); the first column is the session foreign key
+MESSAGE_TABLES = {
+    'chatbot': ('chatbot_messages', ('chatbot_session_id', 'sender', 'input_text', 'output_text')),
+    'home': ('home_messages', ('home_session_id', 'sender', 'input_text', 'translated_text')),
+}
+
+log = logging.getLogger(__name__)
+
+
+def message_row(kind, data):
+    """Column tuple for one message dict; accepts session_id/output_text as generic aliases.
+
+    Raises ValueError for a missing or non-integer session id.
+    """
+    table, columns = MESSAGE_TABLES[kind]
+    session_column, _, _, text_column = columns
+    session_id = data.get(session_column, data.get('session_id'))
+    if session_id is None:
+        raise ValueError(f'{kind} message without {session_column}')
+    # Checked here so a malformed id is a 400 for its sender rather than a
+    # failed write-behind transaction
+    try:
+        if isinstance(session_id, (bool, float)):
+            raise TypeError
+        session_id = int(session_id)
+    except (TypeError, ValueError):
+        raise ValueError(f'{session_column} must be an integer') from None
+    if session_id <= 0:
+        raise ValueError(f'{session_column} must be positive')
+    return (session_id, data.get('sender'), data.get('input_text'), data.get(text_column, data.get('output_text')))
+
+
+def _split(rows_by_kind):
+    """Two halves of a {kind: rows} batch."""
+    flat = [(kind, row) for kind, rows in rows_by_kind.items() for row in rows]
+    halves = ({}, {})
+    for i, (kind, row) in enumerate(flat):
+        halves[i * 2 >= len(flat)].setdefault(kind, []).append(row)
+    return halves
+
+
+def insert_messages(conn, rows_by_kind):
+    """Insert {kind: [row, ...]} in one transaction; returns {kind: rows inserted}."""
+    cursor = conn.cursor()
+    counts = {}
+    try:
+        for kind, rows in rows_by_kind.items():
+            if not rows:
+                continue
+            table, columns = MESSAGE_TABLES[kind]
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                rows)
+            counts[kind] = len(rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return counts
+
+
+class WriteBehindBuffer:
+    """Groups single-message writes into periodic transactions.
+
+    `get_connection()` supplies a connection for each flush (and is closed
+    afterwards). A writer that finds `max_pending` rows queued flushes
+    inline instead of letting the buffer grow.
+
+    When MySQL rejects the data itself (IntegrityError / DataError, e.g. a
+    message for a session deleted meanwhile) the batch is split in halves
+    and retried until the offending rows are isolated; only those are
+    dropped and logged, so one bad row can't hold up everyone else's. Any
+    other failure (connection lost, server down) keeps the unwritten rows
+    for the next attempt, up to `max_pending`; past that the oldest are
+    dropped and logged rather than growing without bound.
+    """
+
+    def __init__(self, get_connection, flush_interval=0.25, max_rows=500, max_pending=20000, on_flush=None):
+        self.get_connection = get_connection
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        # Called with (rows written, seconds) after each successful flush
+        self.on_flush = on_flush
+        self._pending = {kind: [] for kind in MESSAGE_TABLES}
+        self._count = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped_rows = 0
+        self.rejected_rows = 0
+        self._thread = threading.Thread(target=self._run, name='message-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, kind, row):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('write-behind buffer is closed')
+            self._pending[kind].append(row)
+            self._count += 1
+            if self._count >= self.max_rows:
+                self._cond.notify()
+            full = self._count >= self.max_pending
+        if full:
+            # The flusher is falling behind; make the writer wait for it
+            self.flush()
+
+    def __len__(self):
+        with self._cond:
+            return self._count
+
+    def _take(self):
+        with self._cond:
+            batch, self._pending = self._pending, {kind: [] for kind in MESSAGE_TABLES}
+            self._count = 0
+            return batch
+
+    def _requeue(self, batch):
+        dropped = False
+        with self._cond:
+            for kind, rows in batch.items():
+                self._pending[kind][:0] = rows
+                self._count += len(rows)
+            while self._count > self.max_pending:
+                kind = max(self._pending, key=lambda k: len(self._pending[k]))
+                self._pending[kind].pop(0)
+                self._count -= 1
+                self.dropped_rows += 1
+                dropped = True
+            if dropped:
+                log.error('write-behind buffer full; %d messages dropped so far', self.dropped_rows)
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written."""
+        with self._flush_lock:
+            batch = self._take()
+            total = sum(len(rows) for rows in batch.values())
+            if not total:
+                return 0
+            start = time.perf_counter()
+            written = 0
+            # Transactions still to attempt; normally just the whole batch
+            parts = [batch]
+            conn = None
+            try:
+                conn = self.get_connection()
+                while parts:
+                    part = parts[-1]
+                    size = sum(len(rows) for rows in part.values())
+                    try:
+                        insert_messages(conn, part)
+                        written += size
+                    except (errors.IntegrityError, errors.DataError) as e:
+                        if size > 1:
+                            parts.pop()
+                            # Reversed so the first half is written first and rows keep their order
+                            parts.extend(reversed(_split(part)))
+                            continue
+                        kind, rows = next((k, r) for k, r in part.items() if r)
+                        self.rejected_rows += 1
+                        log.error('write-behind dropped a %s message MySQL rejected (%s): %r', kind, e, rows[0])
+                    parts.pop()
+            except Exception:
+                self.failed_flushes += 1
+                log.exception('write-behind flush failed with %d of %d messages unwritten; will retry',
+                              total - written, total)
+                merged = {kind: [] for kind in MESSAGE_TABLES}
+                for part in reversed(parts):
+                    for kind, rows in part.items():
+                        merged[kind].extend(rows)
+                self._requeue(merged)
+            finally:
+                if conn is not None:
+                    conn.close()
+            if written:
+                self.flushes += 1
+                self.flushed_rows += written
+                if self.on_flush:
+                    self.on_flush(written, time.perf_counter() - start)
+            return written
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._count >= self.max_rows, self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def close(self):
+        """Stop the background thread and flush what is left (registered with atexit)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._cond:
+            pending = self._count
+        return {
+            'pending': pending,
+            'flushes': self.flushes,
+            'flushed_rows': self.flushed_rows,
+            'failed_flushes': self.failed_flushes,
+            'dropped_rows': self.dropped_rows,
+            'rejected_rows': self.rejected_rows,
+            'flush_interval_s': self.flush_interval,
+        }
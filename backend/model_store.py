@@ -0,0 +1,243 @@
+"""Versioned model artifacts and the in-process holder that serves them.
+
+An artifact is a directory under models/:
+
+    models/<version>/manifest.json   labels, feature spec, training metrics
+    models/<version>/model.joblib    the fitted estimator (uncompressed)
+    models/<version>/forest/*.npy    FlatForest arrays, for forest models
+    models/CURRENT                   name of the version the server should use
+
+With FAST_FOREST=1 the forest/*.npy arrays are memory-mapped read-only,
+so several worker processes serving the same version share the same
+page-cache pages instead of each holding a private copy. The default
+sklearn path gets no such sharing: model.joblib is opened with
+mmap_mode='r', but sklearn's Tree.__setstate__ copies the node arrays
+into private memory when the estimator is unpickled. Publishing a new version only rewrites CURRENT (atomically),
+and ModelHolder swaps the served model with a single reference assignment,
+so predictions in flight finish on the old model and the next batch uses
+the new one without touching the video stream.
+"""
+import json
+import os
+import pickle
+import re
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from features import NUM_LANDMARKS, NUM_FEATURES
+from fast_forest import FlatForest, compile_model
+
+FORMAT_VERSION = 1
+MODELS_DIR = 'models'
+CURRENT_FILE = 'CURRENT'
+# Version names are plain directory names under models/ (never paths)
+VERSION_NAME = re.compile(r'^[\w.-]+$')
+
+# Class index -> text sent to the frontend; new artifacts carry their own copy
+DEFAULT_LABELS = {0: 'A', 1: 'B', 2: 'C', 3: 'D', 4: 'E', 5: 'F', 6: 'G', 7: 'H', 8: 'I',
+                  9: 'J', 10: 'K', 11: 'L', 12: 'M', 13: 'N', 14: 'O', 15: 'P', 16: 'Q', 17: 'R',
+                  18: 'S', 19: 'T', 20: 'U', 21: 'V', 22: 'W', 23: 'SPACE', 24: 'DELETE'}
+
+FEATURE_SPEC = {
+    'name': 'landmarks_xy_min_shifted',
+    'num_landmarks': NUM_LANDMARKS,
+    'num_features': NUM_FEATURES,
+    'dtype': 'float32',
+}
+
+
+class ServedModel:
+    """What the predictor sees: an estimator plus the labels it was trained with.
+
+    `classes_` holds the display text ('A', 'SPACE', ...) so a prediction and
+    its label always come from the same artifact, even across a swap.
+    """
+
+    def __init__(self, estimator, labels, version='legacy', manifest=None):
+        self.estimator = estimator
+        self.labels = {int(k): v for k, v in labels.items()}
+        self.label_ids = {v: k for k, v in self.labels.items()}
+        self.version = version
+        self.manifest = manifest or {}
+        self.classes_ = np.array([self.labels.get(int(c), str(c)) for c in estimator.classes_], dtype=object)
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(X)
+
+
+def _write_atomic(path, text):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save_artifact(model, metrics=None, labels=None, root=MODELS_DIR, version=None, make_current=True):
+    """Write a new artifact directory and (by default) point CURRENT at it."""
+    version = version or time.strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(root, version)
+    os.makedirs(path, exist_ok=False)
+
+    labels = labels or {int(c): DEFAULT_LABELS.get(int(c), str(c)) for c in model.classes_}
+    # compress=0 keeps arrays as raw buffers inside the file, which is what
+    # makes mmap_mode loading possible
+    joblib.dump(model, os.path.join(path, 'model.joblib'), compress=0)
+    compiled = compile_model(model)
+    if isinstance(compiled, FlatForest):
+        compiled.save(os.path.join(path, 'forest'))
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'estimator': type(model).__name__,
+        'labels': {str(k): v for k, v in labels.items()},
+        'feature_spec': FEATURE_SPEC,
+        'metrics': metrics or {},
+        'has_flat_forest': isinstance(compiled, FlatForest),
+    }
+    _write_atomic(os.path.join(path, 'manifest.json'), json.dumps(manifest, indent=2))
+    if make_current:
+        _write_atomic(os.path.join(root, CURRENT_FILE), version + '\n')
+    return path
+
+
+class InvalidVersion(ValueError):
+    pass
+
+
+def version_path(root, version):
+    """models/<version> for a version name; rejects anything that isn't a plain subdirectory name.
+
+    Artifacts are unpickled on load, so a version must never be able to
+    point outside `root`.
+    """
+    if not isinstance(version, str) or not VERSION_NAME.match(version) or version in ('.', '..'):
+        raise InvalidVersion(f'invalid model version {version!r}')
+    path = os.path.join(root, version)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f'no model version {version!r} in {root}')
+    return path
+
+
+def current_version(root=MODELS_DIR):
+    try:
+        with open(os.path.join(root, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_artifact(path, fast_forest=False):
+    with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported artifact format {manifest.get('format_version')}")
+    spec = manifest.get('feature_spec', {})
+    if spec.get('num_features') != NUM_FEATURES or spec.get('name') != FEATURE_SPEC['name']:
+        raise ValueError(f'{path}: feature spec {spec} does not match this server ({FEATURE_SPEC})')
+
+    if fast_forest and manifest.get('has_flat_forest'):
+        model_path = os.path.join(path, 'model.joblib')
+        estimator = FlatForest.load(os.path.join(path, 'forest'), mmap_mode='r',
+                                    fallback_loader=lambda: joblib.load(model_path, mmap_mode='r'))
+    else:
+        estimator = joblib.load(os.path.join(path, 'model.joblib'), mmap_mode='r')
+        if fast_forest:
+            estimator = compile_model(estimator)
+    return ServedModel(estimator, manifest['labels'], manifest['version'], manifest)
+
+
+def load_legacy(path, fast_forest=False):
+    """model.p from older train_classifier.py runs, with the built-in label map."""
+    model = pickle.load(open(path, 'rb'))['model']
+    if fast_forest:
+        model = compile_model(model)
+    return ServedModel(model, DEFAULT_LABELS)
+
+
+class ModelHolder:
+    """Owns the currently served model and swaps it atomically on reload.
+
+    `on_swap(served)` is called after every successful swap (the app uses it
+    to point the batched predictor at the new model).
+    """
+
+    def __init__(self, root=MODELS_DIR, legacy_path=None, fast_forest=False, on_swap=None):
+        self.root = root
+        self.legacy_path = legacy_path
+        self.fast_forest = fast_forest
+        self.on_swap = on_swap
+        self.current = None
+        self._lock = threading.Lock()
+        self._watch_thread = None
+        self._watched = None
+
+    @property
+    def labels(self):
+        current = self.current
+        return current.labels if current else DEFAULT_LABELS
+
+    def load_initial(self):
+        version = current_version(self.root)
+        if version:
+            return self.reload(version)
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            self._swap(load_legacy(self.legacy_path, self.fast_forest))
+            return self.current
+        return None
+
+    def reload(self, version=None):
+        """Load `version` (default: whatever CURRENT names) and swap it in."""
+        with self._lock:
+            version = version or current_version(self.root)
+            if not version:
+                raise FileNotFoundError(f'no {CURRENT_FILE} file in {self.root}')
+            served = load_artifact(version_path(self.root, version), self.fast_forest)
+            self._swap(served)
+            return served
+
+    def _swap(self, served):
+        self.current = served
+        if self.on_swap:
+            self.on_swap(served)
+
+    def info(self):
+        current = self.current
+        if current is None:
+            return {'loaded': False}
+        return {
+            'loaded': True,
+            'version': current.version,
+            'estimator': type(current.estimator).__name__,
+            'metrics': current.manifest.get('metrics', {}),
+            'created_at': current.manifest.get('created_at'),
+        }
+
+    def watch(self, interval, logger=None):
+        """Poll CURRENT every `interval` seconds and reload when it changes."""
+        if self._watch_thread or interval <= 0:
+            return
+        self._watched = current_version(self.root)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                version = current_version(self.root)
+                if version and version != self._watched and (self.current is None or version != self.current.version):
+                    try:
+                        self.reload(version)
+                        if logger:
+                            logger.info(f'Model reloaded: version={version}')
+                    except Exception:
+                        if logger:
+                            logger.exception(f'Model reload failed for version={version}')
+                self._watched = version
+
+        self._watch_thread = threading.Thread(target=run, name='model-watcher', daemon=True)
+        self._watch_thread.start()
@@ -0,0 +1,105 @@
+"""Keyset (cursor) pagination for the history endpoints.
+
+Pages are ordered by (timestamp, id) and the cursor is the last row's pair,
+so page N costs the same as page 1 (no OFFSET) and rows inserted while a
+client is paging don't shift what it sees. Response bodies stay plain JSON
+arrays; the cursor for the next page and the optional total travel in the
+X-Next-Cursor and X-Total-Count headers.
+
+Query parameters: limit (bounded), cursor (from X-Next-Cursor) and
+total=0 to skip the COUNT(*).
+"""
+import base64
+from datetime import datetime
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+
+
+def encode_cursor(timestamp, row_id):
+    raw = f'{timestamp.isoformat()}|{int(row_id)}'
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """(datetime, id) from a cursor token; ValueError if it isn't one of ours."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('ascii')
+        ts, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise ValueError('invalid cursor') from None
+
+
+class PageRequest:
+    def __init__(self, limit=DEFAULT_LIMIT, after=None, include_total=True):
+        self.limit = limit
+        self.after = after
+        self.include_total = include_total
+
+    @classmethod
+    def from_args(cls, args, prefix='', default_limit=DEFAULT_LIMIT):
+        """Parse <prefix>limit / <prefix>cursor / total from request.args; ValueError on bad input."""
+        try:
+            limit = int(args.get(f'{prefix}limit', default_limit))
+        except ValueError:
+            raise ValueError(f'{prefix}limit must be an integer') from None
+        limit = max(1, min(limit, MAX_LIMIT))
+        token = args.get(f'{prefix}cursor')
+        after = decode_cursor(token) if token else None
+        include_total = args.get('total', '1').lower() not in ('0', 'false', 'no')
+        return cls(limit, after, include_total)
+
+
+class Page:
+    def __init__(self, rows, next_cursor=None, total=None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.total = total
+
+    def headers(self, prefix=''):
+        """Response headers; `prefix` ('Home-', ...) distinguishes several lists in one response."""
+        out = {}
+        if self.next_cursor:
+            out[NEXT_CURSOR_HEADER.replace('X-', f'X-{prefix}', 1)] = self.next_cursor
+        if self.total is not None:
+            out[TOTAL_COUNT_HEADER.replace('X-', f'X-{prefix}', 1)] = str(self.total)
+        return out
+
+
+def fetch_page(cursor, table, columns, ts_col, id_col, page, where='1=1', params=(), descending=True):
+    """Run one keyset page query on a dictionary cursor.
+
+    `where`/`params` are the endpoint's own filter (e.g. "user_id = %s");
+    the keyset condition is expanded into plain comparisons so MySQL can
+    range-scan an index on (filter column, ts_col).
+    """
+    op = '<' if descending else '>'
+    order = 'DESC' if descending else 'ASC'
+    conditions = [f'({where})']
+    query_params = list(params)
+    if page.after is not None:
+        ts, row_id = page.after
+        conditions.append(f'({ts_col} {op} %s OR ({ts_col} = %s AND {id_col} {op} %s))')
+        query_params += [ts, ts, row_id]
+
+    cursor.execute(
+        f"SELECT {', '.join(columns)} FROM {table} WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {ts_col} {order}, {id_col} {order} LIMIT %s",
+        tuple(query_params) + (page.limit + 1,))
+    rows = cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[ts_col], last[id_col])
+
+    total = None
+    if page.include_total:
+        cursor.execute(f'SELECT COUNT(*) AS n FROM {table} WHERE {where}', tuple(params))
+        total = cursor.fetchone()['n']
+    return Page(rows, next_cursor, total)
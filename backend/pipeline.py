@@ -0,0 +1,161 @@
+"""Per-frame recognition pipeline shared by the server and bench_pipeline.py.
+
+Stages, each timed through an optional StageTimer:
+    color      BGR -> RGB (on the ROI crop when tracking)
+    mediapipe  hands.process
+    features   landmarks -> 42 float32 features
+    predict    classifier
+    draw       landmarks, box and letter on the frame
+(decode and encode are timed by the frame source and the JPEG encoder.)
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from features import landmarks_to_array, extract_features, hand_bbox
+from roi import ROITracker
+
+mp_hands = mp.solutions.hands
+mp_drawing = mp.solutions.drawing_utils
+mp_drawing_styles = mp.solutions.drawing_styles
+
+
+class StageTimer:
+    """Collects per-stage durations (seconds). `on_record(stage, seconds)` is called for each one."""
+
+    def __init__(self, keep_samples=True, on_record=None):
+        self.keep_samples = keep_samples
+        self.on_record = on_record
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        if self.keep_samples:
+            self.samples[name].append(seconds)
+        if self.on_record:
+            self.on_record(name, seconds)
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p90_ms, p99_ms, max_ms}}"""
+        out = {}
+        for name, values in self.samples.items():
+            ms = np.asarray(values) * 1000.0
+            out[name] = {
+                'count': int(ms.size),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p90_ms': float(np.percentile(ms, 90)),
+                'p99_ms': float(np.percentile(ms, 99)),
+                'max_ms': float(ms.max()),
+            }
+        return out
+
+
+class NullTimer:
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def record(self, name, seconds):
+        pass
+
+
+class FrameResult:
+    __slots__ = ('hand_landmarks', 'points', 'text', 'confidence', 'bbox')
+
+    def __init__(self, hand_landmarks=None, points=None, text=None, confidence=0.0, bbox=None):
+        self.hand_landmarks = hand_landmarks
+        self.points = points
+        self.text = text
+        self.confidence = confidence
+        self.bbox = bbox
+
+
+def draw_overlay(frame, result):
+    if result is None or result.hand_landmarks is None:
+        return
+    # Draw for visual feedback in the stream
+    mp_drawing.draw_landmarks(
+        frame, result.hand_landmarks, mp_hands.HAND_CONNECTIONS,
+        mp_drawing_styles.get_default_hand_landmarks_style(),
+        mp_drawing_styles.get_default_hand_connections_style())
+
+    if result.text is not None:
+        x1, y1, x2, y2 = result.bbox
+        # Draw the Green Bounding Box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 4)
+        # Draw the Predicted Character Text (Green)
+        cv2.putText(frame, result.text, (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 255, 0), 3, cv2.LINE_AA)
+
+
+class RecognitionPipeline:
+    """Detection + classification for one stream.
+
+    `predict(features)` returns (text, confidence); the server passes the
+    batched predictor, the benchmark can pass the model directly. Not
+    thread-safe: MediaPipe's Hands graph keeps per-stream tracking state.
+    """
+
+    def __init__(self, hands, predict, roi_tracker=None, timer=None):
+        self.hands = hands
+        self.predict = predict
+        self.roi_tracker = roi_tracker or ROITracker(enabled=False)
+        self.timer = timer or NullTimer()
+
+    def reset(self):
+        self.roi_tracker.reset()
+
+    def detect(self, frame):
+        """(hand_landmarks, points) with points as full-frame normalized (21, 2), or (None, None)."""
+        H, W = frame.shape[:2]
+        # Detect on a crop around the last hand when ROI tracking is on, else the full frame
+        detect_img, region = self.roi_tracker.crop(frame)
+        with self.timer.stage('color'):
+            frame_rgb = cv2.cvtColor(detect_img, cv2.COLOR_BGR2RGB)
+        with self.timer.stage('mediapipe'):
+            results = self.hands.process(frame_rgb)
+
+        if not results.multi_hand_landmarks:
+            self.roi_tracker.update(None, frame.shape)
+            return None, None
+
+        hand_landmarks = results.multi_hand_landmarks[0]
+        points = self.roi_tracker.to_frame(landmarks_to_array(hand_landmarks), region, frame.shape)
+        if region != (0, 0, W, H):
+            # Move the landmarks into full-frame coordinates for drawing
+            for lm, (x, y) in zip(hand_landmarks.landmark, points):
+                lm.x, lm.y = float(x), float(y)
+        self.roi_tracker.update(points, frame.shape)
+        return hand_landmarks, points
+
+    def classify(self, points):
+        with self.timer.stage('features'):
+            data_aux = extract_features(points)
+        with self.timer.stage('predict'):
+            return self.predict(data_aux)
+
+    def process(self, frame, classify=True):
+        hand_landmarks, points = self.detect(frame)
+        result = FrameResult(hand_landmarks, points)
+        if points is not None and classify:
+            result.text, result.confidence = self.classify(points)
+            # Calculate bounding box coordinates based on landmark min/max
+            H, W = frame.shape[:2]
+            result.bbox = hand_bbox(points, W, H)
+        return result
+
+    def draw(self, frame, result):
+        with self.timer.stage('draw'):
+            draw_overlay(frame, result)
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+
+class ROITracker:
+    """Crops frames around the last detected hand before running MediaPipe.
+
+    Once a hand has been found, the next frame is cut down to a square around
+    its bounding box (grown by `margin` on every side) and downscaled so its
+    longest side is at most `max_side` pixels. If no hand is found in the
+    crop, tracking is considered lost and the next frame is searched in full.
+    Landmarks found in a crop are mapped back to full-frame normalized
+    coordinates with `to_frame`, so features are unchanged by cropping.
+    """
+
+    def __init__(self, enabled=True, margin=0.3, max_side=256, min_side=64):
+        self.enabled = enabled
+        self.margin = margin
+        self.max_side = max_side
+        self.min_side = min_side
+        self.region = None
+
+    def reset(self):
+        self.region = None
+
+    def crop(self, frame):
+        """Return (image_for_detection, region) where region is (x, y, w, h) in frame pixels."""
+        H, W = frame.shape[:2]
+        if not self.enabled or self.region is None:
+            return frame, (0, 0, W, H)
+
+        x, y, w, h = self.region
+        image = frame[y:y + h, x:x + w]
+        longest = max(w, h)
+        if longest > self.max_side:
+            scale = self.max_side / float(longest)
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        return image, self.region
+
+    def update(self, points, frame_shape):
+        """Track the hand from full-frame normalized (21, 2) points, or drop tracking if None."""
+        if not self.enabled:
+            return
+        if points is None:
+            self.region = None
+            return
+
+        H, W = frame_shape[:2]
+        mins = points.min(axis=0) * (W, H)
+        maxs = points.max(axis=0) * (W, H)
+        cx, cy = (mins + maxs) / 2.0
+        side = max(maxs[0] - mins[0], maxs[1] - mins[1], self.min_side) * (1.0 + 2.0 * self.margin)
+
+        x1 = int(max(0, cx - side / 2.0))
+        y1 = int(max(0, cy - side / 2.0))
+        x2 = int(min(W, cx + side / 2.0))
+        y2 = int(min(H, cy + side / 2.0))
+        if x2 - x1 < self.min_side or y2 - y1 < self.min_side:
+            self.region = None
+        else:
+            self.region = (x1, y1, x2 - x1, y2 - y1)
+
+    @staticmethod
+    def to_frame(points, region, frame_shape):
+        """Map (21, 2) points normalized to `region` back to full-frame normalized coordinates."""
+        H, W = frame_shape[:2]
+        x, y, w, h = region
+        if (x, y, w, h) == (0, 0, W, H):
+            return points
+        scale = np.array((w / float(W), h / float(H)), dtype=np.float32)
+        offset = np.array((x / float(W), y / float(H)), dtype=np.float32)
+        return points * scale + offset
+
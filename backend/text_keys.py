@@ -0,0 +1,30 @@
+"""Normalized text hashes used as indexed cache keys.
+
+translation_sessions and tts_sessions store input_hash next to input_text
+so cache lookups hit a composite index instead of scanning an unindexed
+TEXT column. Normalization is deliberately light (Unicode NFC, trimmed,
+runs of whitespace collapsed) so "Hello  world " and "Hello world" share a
+cached result while anything that could change a translation does not.
+"""
+import hashlib
+import re
+import unicodedata
+
+HASH_LENGTH = 64  # hex sha256, stored as CHAR(64)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    if text is None:
+        return ''
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', str(text))).strip()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def same_text(a, b):
+    """Guard against hash collisions when reading a row found by input_hash."""
+    return normalize_text(a) == normalize_text(b)
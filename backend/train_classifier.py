@@ -1,28 +1,175 @@
+import argparse
+import json
+import os
 import pickle
+import time
 
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
 from sklearn.metrics import accuracy_score
+from sklearn.neighbors import KNeighborsClassifier
 import numpy as np
 
+from dataset_store import DatasetReader, DATASET_DIR
+from fast_forest import compile_model, FlatForest
+from model_store import save_artifact
 
-data_dict = pickle.load(open('./data.pickle', 'rb'))
+# Model families the search knows about; a grid file refers to them by name.
+# n_jobs stays 1 inside the models: the live loop predicts one row at a time
+# in-process, and per-call thread fan-out only adds latency there.
+MODEL_FAMILIES = {
+    'random_forest': lambda: RandomForestClassifier(n_jobs=1),
+    'extra_trees': lambda: ExtraTreesClassifier(n_jobs=1),
+    'knn': lambda: KNeighborsClassifier(),
+    'logistic_regression': lambda: LogisticRegression(max_iter=2000),
+}
 
-data = np.asarray(data_dict['data'])
-labels = np.asarray(data_dict['labels'])
+DEFAULT_GRID = [
+    {'model': 'random_forest', 'params': {'n_estimators': [25, 50, 100], 'max_depth': [None, 12, 20]}},
+    {'model': 'extra_trees', 'params': {'n_estimators': [50, 100], 'max_depth': [None, 16]}},
+    {'model': 'knn', 'params': {'n_neighbors': [3, 5, 9]}},
+    {'model': 'logistic_regression', 'params': {'C': [1.0, 10.0]}},
+]
 
-x_train, x_test, y_train, y_test = train_test_split(data, labels, test_size=0.2, shuffle=True, stratify=labels)
 
-model = RandomForestClassifier()
+def load_data():
+    if os.path.exists(os.path.join(DATASET_DIR, 'meta.json')):
+        # Columnar dataset written by create_dataset.py: memory-mapped, no unpickling
+        dataset = DatasetReader(DATASET_DIR)
+        return dataset.features, dataset.class_names()
+    data_dict = pickle.load(open('./data.pickle', 'rb'))
+    return np.asarray(data_dict['data']), np.asarray(data_dict['labels'])
 
-model.fit(x_train, y_train)
 
-y_predict = model.predict(x_test)
+def save_model(model, metrics=None, path='model.p'):
+    f = open(path, 'wb')
+    pickle.dump({'model': model}, f)
+    f.close()
 
-score = accuracy_score(y_predict, y_test)
+    # Versioned artifact the server loads (and hot-reloads) from models/
+    artifact = save_artifact(model, metrics)
+    print(f'Saved model artifact {artifact}')
 
-print('{}% of samples were classified correctly !'.format(score * 100))
 
-f = open('model.p', 'wb')
-pickle.dump({'model': model}, f)
-f.close()
+def train_default(data, labels):
+    x_train, x_test, y_train, y_test = train_test_split(data, labels, test_size=0.2, shuffle=True, stratify=labels)
+
+    model = RandomForestClassifier()
+
+    model.fit(x_train, y_train)
+
+    y_predict = model.predict(x_test)
+
+    score = accuracy_score(y_predict, y_test)
+
+    print('{}% of samples were classified correctly !'.format(score * 100))
+
+    save_model(model, {'test_accuracy': float(score), 'train_rows': len(x_train), 'test_rows': len(x_test)})
+
+
+def measure_latency(model, x_test, single_rows=300, batch_repeat=5):
+    """Single-row p50/p95 and batched per-row prediction latency in microseconds."""
+    rows = np.ascontiguousarray(x_test[:single_rows], dtype=np.float32)
+    model.predict_proba(rows[:1])  # warm-up
+    samples = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict_proba(row[np.newaxis, :])
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    batch = np.ascontiguousarray(x_test, dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(batch_repeat):
+        model.predict_proba(batch)
+    batch_us = (time.perf_counter() - start) * 1e6 / (batch_repeat * len(batch))
+
+    return {
+        'single_row_p50_us': float(np.percentile(samples, 50)),
+        'single_row_p95_us': float(np.percentile(samples, 95)),
+        'batch_per_row_us': float(batch_us),
+    }
+
+
+def search(data, labels, grid, cv, budget_us, max_size_mb, fast_forest, report_path):
+    x_train, x_test, y_train, y_test = train_test_split(data, labels, test_size=0.2, shuffle=True, stratify=labels)
+    folds = StratifiedKFold(n_splits=cv, shuffle=True)
+
+    # 1. Cross-validated accuracy of every candidate, spread over all cores
+    candidates = []
+    for entry in grid:
+        family = entry['model']
+        params = {k: v if isinstance(v, list) else [v] for k, v in entry.get('params', {}).items()}
+        gs = GridSearchCV(MODEL_FAMILIES[family](), params, cv=folds, n_jobs=-1, refit=False)
+        gs.fit(x_train, y_train)
+        for p, mean, std in zip(gs.cv_results_['params'], gs.cv_results_['mean_test_score'], gs.cv_results_['std_test_score']):
+            candidates.append({'model': family, 'params': p, 'cv_accuracy': float(mean), 'cv_std': float(std)})
+        print(f'{family}: {len(gs.cv_results_["params"])} candidates cross-validated')
+
+    # 2. Fit every candidate on the training split (in parallel) ...
+    def fit_one(c):
+        return MODEL_FAMILIES[c['model']]().set_params(**c['params']).fit(x_train, y_train)
+    fitted = Parallel(n_jobs=-1)(delayed(fit_one)(c) for c in candidates)
+
+    # 3. ... then measure latency one at a time so the timings don't compete for cores
+    for c, model in zip(candidates, fitted):
+        served = compile_model(model) if fast_forest else model
+        c['fast_forest'] = isinstance(served, FlatForest)
+        c['test_accuracy'] = float(accuracy_score(y_test, model.predict(x_test)))
+        c['size_mb'] = len(pickle.dumps(model)) / 1e6
+        c.update(measure_latency(served, x_test))
+        c['within_budget'] = c['single_row_p95_us'] <= budget_us and (max_size_mb is None or c['size_mb'] <= max_size_mb)
+        print(f"{c['model']:20s} {json.dumps(c['params']):45s} cv={c['cv_accuracy']:.4f} "
+              f"p95={c['single_row_p95_us']:8.1f}us batch={c['batch_per_row_us']:7.2f}us/row size={c['size_mb']:.2f}MB"
+              f"{'' if c['within_budget'] else '  (over budget)'}")
+
+    # 4. Most accurate model that fits the budget; ties go to the faster one
+    eligible = [i for i, c in enumerate(candidates) if c['within_budget']]
+    if not eligible:
+        print(f'No candidate meets the {budget_us}us single-row budget; picking the fastest instead')
+        best = min(range(len(candidates)), key=lambda i: candidates[i]['single_row_p95_us'])
+    else:
+        best = max(eligible, key=lambda i: (candidates[i]['cv_accuracy'], -candidates[i]['single_row_p95_us']))
+
+    chosen = candidates[best]
+    print(f"Selected {chosen['model']} {chosen['params']}: cv accuracy {chosen['cv_accuracy'] * 100:.2f}%, "
+          f"test accuracy {chosen['test_accuracy'] * 100:.2f}%, p95 {chosen['single_row_p95_us']:.1f}us")
+    save_model(fitted[best], {
+        'params': chosen['params'],
+        'cv_accuracy': chosen['cv_accuracy'],
+        'test_accuracy': chosen['test_accuracy'],
+        'single_row_p95_us': chosen['single_row_p95_us'],
+        'batch_per_row_us': chosen['batch_per_row_us'],
+        'size_mb': chosen['size_mb'],
+    })
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'budget_us': budget_us, 'max_size_mb': max_size_mb, 'cv_folds': cv,
+                   'selected': best, 'candidates': candidates}, f, indent=2, default=str)
+    print(f'Wrote {report_path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the gesture classifier and write model.p')
+    parser.add_argument('--search', action='store_true',
+                        help='cross-validate a grid of models and pick the most accurate one within the latency budget')
+    parser.add_argument('--grid', help='JSON file: [{"model": "random_forest", "params": {"n_estimators": [50, 100]}}, ...]')
+    parser.add_argument('--cv', type=int, default=5, help='cross-validation folds')
+    parser.add_argument('--budget-us', type=float, default=2000.0,
+                        help='max p95 single-row predict_proba latency in microseconds')
+    parser.add_argument('--max-size-mb', type=float, help='max pickled model size')
+    parser.add_argument('--fast-forest', action='store_true',
+                        help='time forests through the compiled FlatForest path (as served with FAST_FOREST=1)')
+    parser.add_argument('--report', default='training_report.json')
+    args = parser.parse_args()
+
+    data, labels = load_data()
+    if not args.search:
+        train_default(data, labels)
+    else:
+        grid = DEFAULT_GRID
+        if args.grid:
+            with open(args.grid, 'r', encoding='utf-8') as f:
+                grid = json.load(f)
+        search(data, labels, grid, args.cv, args.budget_us, args.max_size_mb, args.fast_forest, args.report)
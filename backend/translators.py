@@ -0,0 +1,100 @@
+"""Upstream translation backends and in-flight request deduplication.
+
+TRANSLATOR_BACKEND picks the implementation:
+    google   deep_translator.GoogleTranslator (the default)
+    stub     offline, deterministic "[es] text" output with an optional
+             artificial delay (TRANSLATOR_STUB_DELAY_MS), for tests and
+             load benchmarks that must not hit Google
+"""
+import threading
+import time
+
+
+class Translator:
+    name = 'base'
+
+    def translate(self, text, source, target):
+        raise NotImplementedError
+
+
+class GoogleTranslator(Translator):
+    name = 'google'
+
+    def __init__(self):
+        # Imported here so the stub backend works without deep_translator installed
+        from deep_translator import GoogleTranslator as _Google
+        self._cls = _Google
+
+    def translate(self, text, source, target):
+        # deep_translator binds the language pair at construction; the object is cheap
+        return self._cls(source=source, target=target).translate(text)
+
+
+class StubTranslator(Translator):
+    name = 'stub'
+
+    def __init__(self, delay_ms=0.0):
+        self.delay = float(delay_ms) / 1000.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, source, target):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return f'[{target}] {text}'
+
+
+BACKENDS = {
+    'google': GoogleTranslator,
+    'stub': StubTranslator,
+}
+
+
+def get_translator(name='google', **options):
+    try:
+        return BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f'unknown translator backend {name!r} (expected one of {sorted(BACKENDS)})') from None
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    `submit(key, start)` returns the Future of the call already running for
+    `key`, or calls `start()` (which must return a concurrent.futures.Future)
+    and remembers it until it finishes. Nothing is cached after completion:
+    a later caller starts a fresh call (caching is the caller's job).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    def submit(self, key, start):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            future = start()
+            self._calls[key] = future
+            self.started += 1
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {'started': self.started, 'shared': self.shared, 'in_flight': len(self._calls)}
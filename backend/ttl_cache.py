@@ -0,0 +1,123 @@
+"""Thread-safe in-process LRU cache with per-entry TTL.
+
+Sits in front of the MySQL-backed translation/TTS caches: a hit here
+answers the request without borrowing a connection at all.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=3600.0, name='cache'):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.name = name
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if self.ttl > 0 and now >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def update(self, items):
+        for key, value in items:
+            self.set(key, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose (key, value) matches; returns how many went."""
+        with self._lock:
+            doomed = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class RefreshingMap:
+    """A small lookup table (e.g. language code -> id) loaded whole and kept in memory.
+
+    `loader()` returns a dict. The table is reloaded when older than `ttl`,
+    or on an unknown key if the last load is at least `miss_refresh`
+    seconds old, so a new row shows up quickly while a bogus key can't
+    turn every request into a reload.
+    """
+
+    def __init__(self, loader, ttl=300.0, miss_refresh=30.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.miss_refresh = miss_refresh
+        self._table = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _reload(self):
+        table = self.loader()
+        with self._lock:
+            self._table = dict(table)
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+
+    def get(self, key, default=None):
+        age = time.monotonic() - self._loaded_at
+        if self._table is None or age > self.ttl or (key not in self._table and age > self.miss_refresh):
+            self._reload()
+        return self._table.get(key, default)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
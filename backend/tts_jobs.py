@@ -0,0 +1,225 @@
+"""Background text-to-speech jobs with content-addressed audio files.
+
+Audio for (text, language, voice) is written to
+<audio_dir>/tts_<sha256 prefix>.mp3, a name every worker process and every
+restart agrees on, so the same sentence is synthesized once and shared.
+
+TTSJobQueue runs synthesis on a bounded thread pool. Submitting a key that
+is already queued or running returns the existing job, and the caller can
+wait on it for a short time or poll it by id. TTS_ENGINE picks the engine:
+    gtts   Google Text-to-Speech via gTTS (the default)
+    stub   offline: writes a tiny placeholder file, for tests and benchmarks
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from text_keys import normalize_text
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+def audio_filename(text, language, voice):
+    key = '\x1f'.join((normalize_text(text), language or '', voice or ''))
+    return f"tts_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.mp3"
+
+
+class GTTSEngine:
+    name = 'gtts'
+
+    def __init__(self):
+        # Imported here so the stub engine works without gTTS installed
+        from gtts import gTTS
+        self._gtts = gTTS
+
+    def synthesize(self, text, language, voice, path):
+        # gTTS has a single voice per language; `voice` is part of the cache key only
+        self._gtts(text=text, lang=language, slow=False).save(path)
+
+
+class StubEngine:
+    name = 'stub'
+
+    def __init__(self, delay_ms=0.0):
+        self.delay = float(delay_ms) / 1000.0
+        self.calls = 0
+
+    def synthesize(self, text, language, voice, path):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        with open(path, 'wb') as f:
+            # ID3 header followed by the request, so files differ per key
+            f.write(b'ID3\x03\x00\x00\x00\x00\x00\x00' + f'{language}:{voice}:{text}'.encode('utf-8'))
+
+
+ENGINES = {
+    'gtts': GTTSEngine,
+    'stub': StubEngine,
+}
+
+
+def get_engine(name='gtts', **options):
+    try:
+        return ENGINES[name](**options)
+    except KeyError:
+        raise ValueError(f'unknown TTS engine {name!r} (expected one of {sorted(ENGINES)})') from None
+
+
+class TTSJob:
+    def __init__(self, key, text, language, voice, filename, meta=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.text = text
+        self.language = language
+        self.voice = voice
+        self.filename = filename
+        # Free-form data for on_done (the app stores language_id here)
+        self.meta = meta or {}
+        # (user_id, client_token) of every request that joined this job
+        self.owners = []
+        self.status = QUEUED
+        self.error = None
+        self.result = {}
+        self.reused_file = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """True once the job has finished (either way) within `timeout`."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        out = {
+            'job_id': self.id,
+            'status': self.status,
+            'language': self.language,
+            'voice': self.voice,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == DONE:
+            out.update(self.result)
+        if self.error:
+            out['error'] = self.error
+        return out
+
+
+class TTSJobQueue:
+    """Bounded pool of synthesis workers with per-key deduplication.
+
+    `on_done(job, owners)` runs on the worker after the audio file exists
+    and before waiters are released; whatever it returns is merged into
+    job.result (the app records the tts_sessions rows there).
+    """
+
+    def __init__(self, engine, audio_dir, web_prefix='/static/audio', workers=2, on_done=None, keep_jobs=1000):
+        self.engine = engine
+        self.audio_dir = audio_dir
+        self.web_prefix = web_prefix.rstrip('/')
+        self.on_done = on_done
+        self.keep_jobs = keep_jobs
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='tts')
+        self._lock = threading.Lock()
+        self._inflight = {}        # key -> job still queued/running
+        self._jobs = OrderedDict()  # job id -> job, newest last, bounded by keep_jobs
+        self.submitted = 0
+        self.deduplicated = 0
+        self.synthesized = 0
+        self.reused = 0
+        self.failed = 0
+        os.makedirs(audio_dir, exist_ok=True)
+
+    def web_path(self, filename):
+        return f'{self.web_prefix}/{filename}'
+
+    def submit(self, text, language, voice, owner=None, meta=None):
+        key = (normalize_text(text), language, voice)
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                self.deduplicated += 1
+            else:
+                job = TTSJob(key, text, language, voice, audio_filename(text, language, voice), meta)
+                self._inflight[key] = job
+                self._jobs[job.id] = job
+                self._trim_jobs()
+                self.submitted += 1
+                self._pool.submit(self._run, job)
+            if owner is not None and owner not in job.owners:
+                job.owners.append(owner)
+        return job
+
+    def _trim_jobs(self):
+        # Oldest finished jobs go first; queued/running ones stay pollable
+        # however many there are (a client holding a 202 job_id must not
+        # get "unknown job")
+        excess = len(self._jobs) - self.keep_jobs
+        if excess <= 0:
+            return
+        for job_id, job in list(self._jobs.items()):
+            if job.status in (DONE, FAILED) and self._inflight.get(job.key) is not job:
+                del self._jobs[job_id]
+                excess -= 1
+                if not excess:
+                    break
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.status = RUNNING
+        path = os.path.join(self.audio_dir, job.filename)
+        try:
+            if os.path.exists(path):
+                job.reused_file = True
+            else:
+                # Write under a temporary name so a reader never sees half a file
+                tmp = f'{path}.{job.id}.tmp'
+                try:
+                    self.engine.synthesize(job.text, job.language, job.voice, tmp)
+                    os.replace(tmp, path)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+            # From here on a new request for this key starts a new job (which
+            # finds the file and only records its own row)
+            with self._lock:
+                self._inflight.pop(job.key, None)
+                owners = list(job.owners)
+            job.result = {'audio_path': self.web_path(job.filename)}
+            if self.on_done:
+                job.result.update(self.on_done(job, owners) or {})
+            with self._lock:
+                if job.reused_file:
+                    self.reused += 1
+                else:
+                    self.synthesized += 1
+            job.status = DONE
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(job.key, None)
+                self.failed += 1
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'engine': self.engine.name,
+                'in_flight': len(self._inflight),
+                'submitted': self.submitted,
+                'deduplicated': self.deduplicated,
+                'synthesized': self.synthesized,
+                'reused_files': self.reused,
+                'failed': self.failed,
+            }
@@ -0,0 +1,370 @@
+import logging
+import threading
+import time
+
+import cv2
+
+log = logging.getLogger(__name__)
+
+
+def configure_capture(cap, width=None, height=None, fourcc=None, buffer_size=None, fps=None):
+    """Apply optional capture properties to an opened cv2.VideoCapture.
+
+    FOURCC is set first because some drivers only accept higher resolutions
+    in compressed formats such as MJPG.
+    """
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc[:4]))
+    if width:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, int(width))
+    if height:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, int(height))
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, float(fps))
+    if buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, int(buffer_size))
+    return cap
+
+
+class JpegEncoder:
+    """JPEG settings for the MJPEG feed plus an output rate cap.
+
+    `quality` is OpenCV's IMWRITE_JPEG_QUALITY (0-100), `scale` resizes the
+    frame before encoding (1.0 = camera resolution) and `max_fps` limits how
+    often a frame is encoded at all; 0 disables the cap.
+    """
+
+    def __init__(self, quality=80, scale=1.0, max_fps=0):
+        self.quality = int(quality)
+        self.scale = float(scale)
+        self.min_interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        self.encoded = 0
+        self.skipped_no_viewers = 0
+        self.skipped_rate = 0
+        self._last_encode = 0.0
+        self._params = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+
+    def due(self, viewers):
+        """Should the current frame be rendered and encoded?"""
+        if not viewers:
+            self.skipped_no_viewers += 1
+            return False
+        if self.min_interval and time.perf_counter() - self._last_encode < self.min_interval:
+            self.skipped_rate += 1
+            return False
+        return True
+
+    def encode(self, frame):
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', frame, self._params)
+        self._last_encode = time.perf_counter()
+        if not ret:
+            return None
+        self.encoded += 1
+        return buffer.tobytes()
+
+    def stats(self):
+        return {
+            'quality': self.quality,
+            'scale': self.scale,
+            'encoded': self.encoded,
+            'skipped_no_viewers': self.skipped_no_viewers,
+            'skipped_rate': self.skipped_rate,
+        }
+
+
+class FrameHub:
+    """Holds the latest encoded frame and prediction and fans them out to viewers.
+
+    Only the newest frame is kept: a viewer that is slower than the camera
+    simply skips to the latest sequence number instead of building a backlog.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._jpeg = None
+        self._prediction = None
+        self._subscribers = 0
+        self._closed = False
+
+    @property
+    def subscribers(self):
+        with self._cond:
+            return self._subscribers
+
+    @property
+    def latest_prediction(self):
+        with self._cond:
+            return self._prediction
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+
+    def publish(self, jpeg, prediction=None):
+        with self._cond:
+            self._seq += 1
+            self._jpeg = jpeg
+            self._prediction = prediction
+            self._cond.notify_all()
+
+    def close(self):
+        """Wake every viewer and tell them no more frames are coming."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def wait_next(self, last_seq, timeout=1.0):
+        """Block until a frame newer than `last_seq` exists; return (seq, jpeg).
+
+        Returns (last_seq, None) on timeout and (None, None) once the hub is closed.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != last_seq or self._closed, timeout)
+            if self._seq != last_seq and self._jpeg is not None:
+                return self._seq, self._jpeg
+            if self._closed:
+                return None, None
+            return last_seq, None
+
+    def stream(self):
+        """Yield the latest JPEG bytes for one viewer until the hub closes."""
+        with self._cond:
+            self._subscribers += 1
+            last_seq = self._seq
+        try:
+            while True:
+                seq, jpeg = self.wait_next(last_seq)
+                if seq is None:
+                    return
+                if jpeg is None:
+                    continue
+                last_seq = seq
+                yield jpeg
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+
+class FrameScheduler:
+    """Paces the capture loop and decides which frames get full inference.
+
+    - Output is capped at `target_fps`; the loop sleeps off any spare budget.
+    - MediaPipe + classification runs on every Nth frame, N starting at
+      target_fps / inference_fps. Frames in between are still streamed.
+    - When the smoothed per-frame cost goes over the frame budget, N is
+      raised (up to `max_interval`); once there is headroom again it is
+      lowered back to its configured value.
+    - Frames that piled up in the camera buffer while we were busy are
+      reported by `stale_frames()` so the caller can grab() past them and
+      always work on the newest image.
+    """
+
+    def __init__(self, target_fps=30.0, inference_fps=30.0, camera_fps=30.0,
+                 max_interval=6, smoothing=0.2, adjust_every=1.0):
+        self.frame_budget = 1.0 / max(target_fps, 0.1)
+        self.camera_period = 1.0 / max(camera_fps, 0.1)
+        self.base_interval = max(1, int(round(target_fps / max(inference_fps, 0.1))))
+        self.inference_interval = self.base_interval
+        self.max_interval = max(self.base_interval, int(max_interval))
+        self.smoothing = smoothing
+        self.adjust_every = adjust_every
+        self.avg_cost = 0.0
+        self.fps = 0.0
+        self.frames = 0
+        self.dropped_frames = 0
+        self._frame_index = 0
+        self._frame_start = None
+        self._last_read = None
+        self._last_adjust = 0.0
+
+    def reset(self):
+        """Forget timing from a previous camera session."""
+        self._frame_index = 0
+        self._frame_start = None
+        self._last_read = None
+        self.inference_interval = self.base_interval
+        self.avg_cost = 0.0
+        self.fps = 0.0
+
+    @property
+    def inference_period(self):
+        """Seconds between inference frames at the current interval and delivered frame rate."""
+        frame_time = self.frame_budget
+        if self.fps > 0:
+            frame_time = max(frame_time, 1.0 / self.fps)
+        return self.inference_interval * frame_time
+
+    def stale_frames(self, max_drop=10):
+        """How many buffered camera frames are older than what we want to show next."""
+        if self._last_read is None:
+            return 0
+        behind = int((time.perf_counter() - self._last_read) / self.camera_period) - 1
+        return max(0, min(behind, max_drop))
+
+    def frame_read(self, dropped=0):
+        now = time.perf_counter()
+        if self._last_read is not None and now > self._last_read:
+            # Smoothed frames/second actually delivered by the loop
+            self.fps += self.smoothing * (1.0 / (now - self._last_read) - self.fps)
+        self._last_read = now
+        self._frame_start = now
+        self.frames += 1
+        self.dropped_frames += dropped
+
+    def should_infer(self):
+        infer = self._frame_index % self.inference_interval == 0
+        self._frame_index += 1
+        return infer
+
+    def frame_done(self):
+        now = time.perf_counter()
+        cost = now - self._frame_start
+        self.avg_cost += self.smoothing * (cost - self.avg_cost)
+
+        if now - self._last_adjust >= self.adjust_every:
+            if self.avg_cost > self.frame_budget and self.inference_interval < self.max_interval:
+                self.inference_interval += 1
+                self._last_adjust = now
+            elif self.avg_cost < 0.6 * self.frame_budget and self.inference_interval > self.base_interval:
+                self.inference_interval -= 1
+                self._last_adjust = now
+
+    def pace(self):
+        spare = self.frame_budget - (time.perf_counter() - self._frame_start)
+        if spare > 0:
+            time.sleep(spare)
+
+    def stats(self):
+        return {
+            'inference_interval': self.inference_interval,
+            'fps': self.fps,
+            'avg_frame_cost_ms': self.avg_cost * 1000.0,
+            'frame_budget_ms': self.frame_budget * 1000.0,
+            'dropped_frames': self.dropped_frames,
+        }
+
+
+class CaptureWorker:
+    """Single background thread that owns the camera and runs recognition.
+
+    `process_frame(frame, run_inference, render)` runs on every captured
+    frame and returns (frame, prediction); the scheduler decides whether that
+    frame gets full inference, and `render` is False when nobody is watching
+    the MJPEG feed (or the encoder's rate cap says to skip this frame) so
+    the overlay can be skipped. Rendered frames are JPEG-encoded once and
+    the same bytes are published to the hub for every viewer.
+
+    The worker starts on demand and releases the camera after `idle_timeout`
+    seconds with neither MJPEG viewers nor `extra_demand()` consumers (for
+    example landmark-only Socket.IO clients).
+
+    `source_factory()` replaces the webcam with any object that has the
+    VideoCapture read/grab/release interface (see frame_sources.py), e.g. a
+    recorded video for headless replay. With a `timer` (pipeline.StageTimer)
+    frame reads are recorded as 'decode' and JPEG encoding as 'encode'.
+    """
+
+    def __init__(self, process_frame, hub, scheduler=None, camera_index=0, idle_timeout=5.0,
+                 capture_options=None, on_start=None, extra_demand=None, encoder=None,
+                 source_factory=None, timer=None):
+        self.process_frame = process_frame
+        self.hub = hub
+        self.encoder = encoder or JpegEncoder()
+        self.extra_demand = extra_demand or (lambda: 0)
+        self.scheduler = scheduler or FrameScheduler()
+        # Passed to configure_capture(): width, height, fourcc, buffer_size, fps
+        self.capture_options = capture_options or {}
+        # Called on the worker thread before the first frame, e.g. to reset trackers
+        self.on_start = on_start
+        self.camera_index = camera_index
+        self.source_factory = source_factory
+        self.timer = timer
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        with self._lock:
+            return self._thread is not None
+
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.hub.reopen()
+            self._thread = threading.Thread(target=self._run, name='capture-worker', daemon=True)
+            self._thread.start()
+
+    def has_demand(self):
+        return self.hub.subscribers > 0 or self.extra_demand() > 0
+
+    def _retire(self, only_if_idle=False):
+        # Closing the hub and clearing the thread happen under the same lock
+        # ensure_running uses, so a viewer arriving now gets a fresh worker
+        # instead of attaching to one that is shutting down.
+        with self._lock:
+            if only_if_idle and self.has_demand():
+                return False
+            if self._thread is threading.current_thread():
+                self.hub.close()
+                self._thread = None
+            return True
+
+    def _run(self):
+        # Everything, source creation included, runs inside the try: a worker
+        # that dies without retiring would leave _thread set (so no new one
+        # is ever started) and every viewer waiting on a hub nobody closes.
+        cap = None
+        try:
+            if self.source_factory:
+                cap = self.source_factory()
+            else:
+                cap = configure_capture(cv2.VideoCapture(self.camera_index), **self.capture_options)
+            self.scheduler.reset()
+            if self.on_start:
+                self.on_start()
+            idle_since = time.time()
+            while True:
+                if self.has_demand():
+                    idle_since = time.time()
+                elif time.time() - idle_since > self.idle_timeout and self._retire(only_if_idle=True):
+                    break
+
+                # Skip frames that went stale in the camera buffer while we
+                # were busy; grab() doesn't decode, so this is cheap.
+                stale = self.scheduler.stale_frames()
+                for _ in range(stale):
+                    cap.grab()
+
+                read_start = time.perf_counter()
+                success, frame = cap.read()
+                if not success:
+                    break
+                if self.timer:
+                    self.timer.record('decode', time.perf_counter() - read_start)
+                self.scheduler.frame_read(stale)
+
+                # Recognition always runs; drawing and encoding only when
+                # someone is watching the MJPEG feed
+                render = self.encoder.due(self.hub.subscribers)
+                frame, prediction = self.process_frame(frame, self.scheduler.should_infer(), render)
+                if render:
+                    encode_start = time.perf_counter()
+                    jpeg = self.encoder.encode(frame)
+                    if self.timer:
+                        self.timer.record('encode', time.perf_counter() - encode_start)
+                    if jpeg is not None:
+                        self.hub.publish(jpeg, prediction)
+
+                self.scheduler.frame_done()
+                self.scheduler.pace()
+        except Exception:
+            log.exception('capture worker stopped')
+        finally:
+            if cap is not None:
+                cap.release()
+            self._retire()
@@ -27,6 +27,7 @@ const BACKEND = import.meta.env.VITE_BACKEND_URL || 'http://127.0.0.1:5000';
 import HistoryModal from './components/HistoryModal';
 import ProfileModal from './components/ProfileModal';
 import AuthModal from './components/AuthModal';
+import LandmarkPreview from './components/LandmarkPreview';
 // import * as utils from './utils.js';
 import { GoogleGenAI } from "@google/genai";
 import { io } from "socket.io-client"; 
@@ -44,6 +45,10 @@ function HomePage({ isActive }) {
   const [isProcessing, setIsProcessing] = useState(false);
   // const [glovesConnected, setGlovesConnected] = useState(false);
   const [currentSessionId, setCurrentSessionId] = useState(null);
+  // Preview mode: server-rendered MJPEG, or local camera + landmark overlay
+  const [landmarkPreview, setLandmarkPreview] = useState(false);
+  // Cursor for the page of messages before the ones shown (null: none left)
+  const [earlierCursor, setEarlierCursor] = useState(null);
   const recognitionRef = useRef(null);
   const scrollRef = useRef(null);
   const socketRef = useRef(null);
@@ -108,6 +113,8 @@ function HomePage({ isActive }) {
       socketRef.current = io(BACKEND);
 
       socketRef.current.on('connect', () => {
+        // Ask for recognized letters (again after every reconnect)
+        socketRef.current.emit('subscribe_recognition');
         setGlovesProcessing(false);
       });
 
@@ -155,6 +162,16 @@ function HomePage({ isActive }) {
     }
   }, [messages, currentTranscript]);
 
+  const toHomeMessages = (msgs) => (msgs || []).map(m => ({ id: m.home_message_id || generateMessageId(), source: m.sender === 'user' ? 'user' : 'ai', text: m.input_text || m.output_text || '', translated: m.translated_text || null, timestamp: new Date(m.created_at || m.createdAt) }));
+
+  const loadEarlierMessages = async () => {
+    if (!earlierCursor || !currentSessionId) return;
+    const uid = (authService.getCurrentUser() || {}).user_id || undefined;
+    const { messages: msgs, nextCursor } = await sessionService.fetchSessionMessagesPage(uid, 'home', currentSessionId, earlierCursor);
+    setMessages(prev => [...toHomeMessages(msgs), ...prev]);
+    setEarlierCursor(nextCursor);
+  };
+
   // initialize or load session/messages
   useEffect(() => {
     (async () => {
@@ -164,8 +181,9 @@ function HomePage({ isActive }) {
         if (sessions && sessions.length > 0) {
           const first = sessions[0];
           setCurrentSessionId(first.id);
-          const msgs = await sessionService.fetchSessionMessages(uid, 'home', first.id);
-          setMessages((msgs || []).map(m => ({ id: m.home_message_id || generateMessageId(), source: m.sender === 'user' ? 'user' : 'ai', text: m.input_text || m.output_text || '', translated: m.translated_text || null, timestamp: new Date(m.created_at || m.createdAt) })));
+          const { messages: msgs, nextCursor } = await sessionService.fetchSessionMessagesPage(uid, 'home', first.id);
+          setMessages(toHomeMessages(msgs));
+          setEarlierCursor(nextCursor);
         } else {
           const ns = await sessionService.createSession(uid, 'home', 'New Home Chat');
           setCurrentSessionId(ns.id);
@@ -182,6 +200,7 @@ function HomePage({ isActive }) {
         const ns = await sessionService.createSession(uid, 'home', 'New Home Chat');
         setCurrentSessionId(ns.id);
         setMessages([]);
+        setEarlierCursor(null);
       } catch (err) {
         console.error('New home session error', err);
       }
@@ -193,9 +212,10 @@ function HomePage({ isActive }) {
       if (!sid) return;
       try {
         const uid = (authService.getCurrentUser() || {}).user_id || undefined;
-        const msgs = await sessionService.fetchSessionMessages(uid, 'home', sid);
+        const { messages: msgs, nextCursor } = await sessionService.fetchSessionMessagesPage(uid, 'home', sid);
         setCurrentSessionId(sid);
-        setMessages((msgs || []).map(m => ({ id: m.home_message_id || generateMessageId(), source: m.sender === 'user' ? 'user' : 'ai', text: m.input_text || m.output_text || '', translated: m.translated_text || null, timestamp: new Date(m.created_at || m.createdAt) })));
+        setMessages(toHomeMessages(msgs));
+        setEarlierCursor(nextCursor);
       } catch (err) {
         console.error('Load home session failed', err);
       }
@@ -362,6 +382,11 @@ function HomePage({ isActive }) {
 
         {/* Messages Display */}
         <div className="transcript-container" ref={scrollRef}>
+          {earlierCursor && (
+            <button className="btn small" onClick={loadEarlierMessages} style={{ alignSelf: 'center' }}>
+              Load earlier messages
+            </button>
+          )}
           {messages.length === 0 && !currentTranscript && (
             <div className="empty-state opacity-50">
               <Mic className="w-12 h-12" />
@@ -465,12 +490,24 @@ function HomePage({ isActive }) {
               <span className="gloves-label">Gloves</span>
               <span className="gloves-status">{glovesConnected ? 'Connected' : 'Not Connected'}</span>
             </button>
-            {glovesConnected && (
+            {glovesConnected && (landmarkPreview ? (
+              <LandmarkPreview socket={socketRef.current} style={{ marginLeft: '0.75rem' }} />
+            ) : (
               <img
                 src={`${BACKEND}/api/video_feed`}
                 alt="Glove camera stream"
                 style={{ width: 160, height: 120, objectFit: 'cover', borderRadius: 8, marginLeft: '0.75rem' }}
               />
+            ))}
+            {glovesConnected && (
+              <button
+                className="control-button secondary"
+                title={landmarkPreview ? 'Show camera stream from the server' : 'Show local camera with landmark overlay (lower bandwidth)'}
+                onClick={() => setLandmarkPreview(v => !v)}
+                style={{ marginLeft: '0.5rem' }}
+              >
+                <span className="control-button-label">{landmarkPreview ? 'Video' : 'Landmarks'}</span>
+              </button>
             )}
           </div>
         </div>
@@ -871,6 +908,8 @@ function ChatbotPage({ isActive }) {
                     socketRef.current = io(BACKEND);
 
                     socketRef.current.on('connect', () => {
+                      // Ask for recognized letters (again after every reconnect)
+                      socketRef.current.emit('subscribe_recognition');
                       setGlovesProcessing(false);
                     });
 
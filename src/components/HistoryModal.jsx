@@ -6,6 +6,9 @@ export default function HistoryModal({ visible, onClose }) {
   const USER = 'guest';
   const [homeSessions, setHomeSessions] = useState([]);
   const [chatSessions, setChatSessions] = useState([]);
+  // Cursors for the next page of each list (null: everything is shown)
+  const [homeCursor, setHomeCursor] = useState(null);
+  const [chatCursor, setChatCursor] = useState(null);
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
@@ -13,10 +16,12 @@ export default function HistoryModal({ visible, onClose }) {
     (async () => {
       setLoading(true);
       try {
-        const hs = await sessionService.getSessions(USER, 'home');
-        const cs = await sessionService.getSessions(USER, 'chatbot');
-        setHomeSessions(hs || []);
-        setChatSessions(cs || []);
+        const hs = await sessionService.getSessionsPage(USER, 'home');
+        const cs = await sessionService.getSessionsPage(USER, 'chatbot');
+        setHomeSessions(hs.sessions || []);
+        setHomeCursor(hs.nextCursor);
+        setChatSessions(cs.sessions || []);
+        setChatCursor(cs.nextCursor);
       } catch (e) {
         console.error('Failed to load history', e);
       } finally {
@@ -25,6 +30,18 @@ export default function HistoryModal({ visible, onClose }) {
     })();
   }, [visible]);
 
+  const loadMore = async (type) => {
+    if (type === 'home') {
+      const page = await sessionService.getSessionsPage(USER, 'home', homeCursor);
+      setHomeSessions((s) => [...s, ...page.sessions]);
+      setHomeCursor(page.nextCursor);
+    } else {
+      const page = await sessionService.getSessionsPage(USER, 'chatbot', chatCursor);
+      setChatSessions((s) => [...s, ...page.sessions]);
+      setChatCursor(page.nextCursor);
+    }
+  };
+
   const loadSession = (type, id) => {
     window.dispatchEvent(new CustomEvent('gv:load-session', { detail: { type, sessionId: id } }));
     onClose();
@@ -66,6 +83,7 @@ export default function HistoryModal({ visible, onClose }) {
                 </li>
               ))}
             </ul>
+            {homeCursor && <button className="btn small" onClick={() => loadMore('home')}>Load more</button>}
           </div>
 
           <div className="history-column">
@@ -85,6 +103,7 @@ export default function HistoryModal({ visible, onClose }) {
                 </li>
               ))}
             </ul>
+            {chatCursor && <button className="btn small" onClick={() => loadMore('chatbot')}>Load more</button>}
           </div>
         </div>
       </div>
@@ -0,0 +1,47 @@
+import React, { useEffect, useRef } from 'react';
+import { subscribeLandmarks, drawLandmarkOverlay } from '../services/landmarkStream';
+
+// Local camera preview with the server's hand landmarks drawn on top.
+// Uses the compact 'landmarks' Socket.IO event instead of the MJPEG feed.
+export default function LandmarkPreview({ socket, width = 160, height = 120, style }) {
+  const videoRef = useRef(null);
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    if (!socket) return undefined;
+    let stream = null;
+    let cancelled = false;
+
+    if (navigator.mediaDevices && navigator.mediaDevices.getUserMedia) {
+      navigator.mediaDevices.getUserMedia({ video: true, audio: false })
+        .then((s) => {
+          if (cancelled) {
+            s.getTracks().forEach(t => t.stop());
+            return;
+          }
+          stream = s;
+          if (videoRef.current) videoRef.current.srcObject = s;
+        })
+        .catch((err) => console.warn('Local camera preview unavailable:', err));
+    }
+
+    const unsubscribe = subscribeLandmarks(socket, (frame) => {
+      const canvas = canvasRef.current;
+      if (!canvas) return;
+      drawLandmarkOverlay(canvas.getContext('2d'), frame, canvas.width, canvas.height);
+    });
+
+    return () => {
+      cancelled = true;
+      unsubscribe();
+      if (stream) stream.getTracks().forEach(t => t.stop());
+    };
+  }, [socket]);
+
+  return (
+    <div style={{ position: 'relative', width, height, borderRadius: 8, overflow: 'hidden', ...style }}>
+      <video ref={videoRef} autoPlay muted playsInline style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
+      <canvas ref={canvasRef} width={width} height={height} style={{ position: 'absolute', inset: 0 }} />
+    </div>
+  );
+}
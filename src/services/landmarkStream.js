@@ -0,0 +1,110 @@
+// Client side of the landmark-only stream (backend/landmark_stream.py).
+// Instead of <img src=".../api/video_feed">, show the local camera and draw
+// the overlay from the compact binary 'landmarks' Socket.IO event.
+
+const FORMAT_VERSION = 1;
+const HEADER_SIZE = 7;
+const NO_LABEL = 255;
+const NUM_LANDMARKS = 21;
+
+// Same pairs as mediapipe's HAND_CONNECTIONS
+export const HAND_CONNECTIONS = [
+  [0, 1], [1, 2], [2, 3], [3, 4],
+  [0, 5], [5, 6], [6, 7], [7, 8],
+  [5, 9], [9, 10], [10, 11], [11, 12],
+  [9, 13], [13, 14], [14, 15], [15, 16],
+  [13, 17], [0, 17], [17, 18], [18, 19], [19, 20],
+];
+
+function float16ToNumber(bits) {
+  const sign = bits & 0x8000 ? -1 : 1;
+  const exp = (bits >> 10) & 0x1f;
+  const frac = bits & 0x3ff;
+  if (exp === 0) return sign * 2 ** -14 * (frac / 1024);
+  if (exp === 0x1f) return frac ? NaN : sign * Infinity;
+  return sign * 2 ** (exp - 15) * (1 + frac / 1024);
+}
+
+export function decodeLandmarkFrame(buffer) {
+  const bytes = buffer instanceof ArrayBuffer ? buffer : buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + buffer.byteLength);
+  const view = new DataView(bytes);
+  const version = view.getUint8(0);
+  if (version !== FORMAT_VERSION) throw new Error(`Unsupported landmark frame version ${version}`);
+  const flags = view.getUint8(1);
+  const seq = view.getUint16(2, true);
+  const label = view.getUint8(4);
+  const confidence = float16ToNumber(view.getUint16(5, true));
+
+  let points = null;
+  if (flags & 1) {
+    points = [];
+    for (let i = 0; i < NUM_LANDMARKS; i++) {
+      const offset = HEADER_SIZE + i * 4;
+      points.push([float16ToNumber(view.getUint16(offset, true)), float16ToNumber(view.getUint16(offset + 2, true))]);
+    }
+  }
+  return { seq, points, label: label === NO_LABEL ? null : label, confidence };
+}
+
+// Subscribe an existing socket.io client; onFrame receives decoded frames
+// plus the label text (e.g. 'A', 'SPACE'). Returns an unsubscribe function.
+export function subscribeLandmarks(socket, onFrame) {
+  let labels = {};
+  let lastSeq = -1;
+  // Sent on subscribe and again whenever the server reloads its model
+  const onLabels = (map) => { labels = map || {}; };
+  const onLandmarks = (payload) => {
+    const frame = decodeLandmarkFrame(payload);
+    // Drop out-of-order frames (seq wraps at 65535)
+    if (lastSeq !== -1 && ((frame.seq - lastSeq) & 0xffff) > 0x8000) return;
+    lastSeq = frame.seq;
+    onFrame({ ...frame, text: frame.label === null ? null : labels[String(frame.label)] || null });
+  };
+  // Subscriptions don't survive a reconnect; ask again each time
+  const onConnect = () => socket.emit('subscribe_landmarks');
+  socket.on('landmark_labels', onLabels);
+  socket.on('landmarks', onLandmarks);
+  socket.on('connect', onConnect);
+  if (socket.connected) onConnect();
+  return () => {
+    socket.emit('unsubscribe_landmarks');
+    socket.off('connect', onConnect);
+    socket.off('landmark_labels', onLabels);
+    socket.off('landmarks', onLandmarks);
+  };
+}
+
+// Draw landmarks, bounding box and label on a canvas laid over the local preview
+export function drawLandmarkOverlay(ctx, frame, width, height) {
+  ctx.clearRect(0, 0, width, height);
+  if (!frame || !frame.points) return;
+  const pts = frame.points.map(([x, y]) => [x * width, y * height]);
+
+  ctx.strokeStyle = '#ffffff';
+  ctx.lineWidth = 2;
+  for (const [a, b] of HAND_CONNECTIONS) {
+    ctx.beginPath();
+    ctx.moveTo(pts[a][0], pts[a][1]);
+    ctx.lineTo(pts[b][0], pts[b][1]);
+    ctx.stroke();
+  }
+  ctx.fillStyle = '#ff3b30';
+  for (const [x, y] of pts) {
+    ctx.beginPath();
+    ctx.arc(x, y, 3, 0, 2 * Math.PI);
+    ctx.fill();
+  }
+
+  if (frame.text) {
+    const xs = pts.map(p => p[0]);
+    const ys = pts.map(p => p[1]);
+    const x1 = Math.min(...xs) - 10;
+    const y1 = Math.min(...ys) - 10;
+    ctx.strokeStyle = '#00ff00';
+    ctx.lineWidth = 4;
+    ctx.strokeRect(x1, y1, Math.max(...xs) + 10 - x1, Math.max(...ys) + 10 - y1);
+    ctx.fillStyle = '#00ff00';
+    ctx.font = 'bold 28px sans-serif';
+    ctx.fillText(frame.text, x1, y1 - 10);
+  }
+}
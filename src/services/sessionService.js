@@ -21,7 +21,17 @@ function _localKey(userId, type) {
   return _key(userId, type);
 }
 
-export async function getSessions(userId, type) {
+// The history endpoints are keyset-paginated: each response is a JSON array
+// and X-Next-Cursor (when present) is passed back to load the next page.
+// Pages are fetched on demand ("Load more"), never the whole history at once.
+async function fetchPage(url, cursor) {
+  const res = await fetch(`${url}&total=0${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`);
+  if (!res.ok) throw new Error(`Request failed (${res.status}): ${url}`);
+  return { rows: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
+// One page of sessions, newest first: { sessions, nextCursor } (nextCursor is null on the last page)
+export async function getSessionsPage(userId, type, cursor = null) {
   // accept userId (numeric) or fallback to client token
   const token = (!userId || !looksLikeNumeric(userId)) ? getOrCreateClientToken() : null;
   if (BACKEND) {
@@ -29,11 +39,10 @@ export async function getSessions(userId, type) {
       const endpoint = type === 'chatbot' ? 'chatbot/history' : 'home/history';
       const param = token ? `client_token=${encodeURIComponent(token)}` : `user_id=${encodeURIComponent(userId)}`;
       const url = `${BACKEND}/api/${endpoint}?${param}`;
-      const res = await fetch(url);
-      if (!res.ok) throw new Error('Failed to fetch sessions');
-      const data = await res.json();
+      const { rows, nextCursor } = await fetchPage(url, cursor);
       // map rows to uniform session objects
-      return data.map(d => ({ id: String(d[`${type === 'chatbot' ? 'chatbot_session_id' : 'home_session_id'}`]), title: d.title || `${type} session`, createdAt: d.started_at || d.created_at, updatedAt: d.started_at || d.created_at, messages: [] }));
+      const sessions = rows.map(d => ({ id: String(d[`${type === 'chatbot' ? 'chatbot_session_id' : 'home_session_id'}`]), title: d.title || `${type} session`, createdAt: d.started_at || d.created_at, updatedAt: d.started_at || d.created_at, messages: [] }));
+      return { sessions, nextCursor };
     } catch (e) {
       console.error('getSessions backend failed', e);
     }
@@ -41,12 +50,17 @@ export async function getSessions(userId, type) {
   try {
     const id = userId || getOrCreateClientToken();
     const raw = localStorage.getItem(_localKey(id, type));
-    return raw ? JSON.parse(raw) : [];
+    return { sessions: raw ? JSON.parse(raw) : [], nextCursor: null };
   } catch (e) {
-    return [];
+    return { sessions: [], nextCursor: null };
   }
 }
 
+// First page of sessions (the newest ones)
+export async function getSessions(userId, type) {
+  return (await getSessionsPage(userId, type)).sessions;
+}
+
 export function saveSessions(userId, type, sessions) {
   localStorage.setItem(_key(userId, type), JSON.stringify(sessions || []));
 }
@@ -80,23 +94,27 @@ export async function createSession(userId, type, title = 'New Chat') {
   return session;
 }
 
-export async function fetchSessionMessages(userId, type, sessionId) {
+// The most recent page of a conversation, in chronological order, plus the
+// cursor for the page of earlier messages: { messages, nextCursor }
+export async function fetchSessionMessagesPage(userId, type, sessionId, cursor = null) {
   if (BACKEND) {
     try {
       const endpoint = type === 'chatbot' ? 'chatbot/messages' : 'home/messages';
-      const url = `${BACKEND}/api/${endpoint}?session_id=${encodeURIComponent(sessionId)}`;
-      const res = await fetch(url);
-      if (!res.ok) throw new Error('Failed to fetch messages');
-      const data = await res.json();
-      return data;
+      const url = `${BACKEND}/api/${endpoint}?session_id=${encodeURIComponent(sessionId)}&order=desc`;
+      const { rows, nextCursor } = await fetchPage(url, cursor);
+      return { messages: rows.reverse(), nextCursor };
     } catch (e) {
       console.error('fetchSessionMessages backend failed', e);
-      return [];
+      return { messages: [], nextCursor: null };
     }
   }
   const sessions = JSON.parse(localStorage.getItem(_localKey(userId, type)) || '[]');
   const s = sessions.find(x => x.id === sessionId);
-  return s ? (s.messages || []) : [];
+  return { messages: s ? (s.messages || []) : [], nextCursor: null };
+}
+
+export async function fetchSessionMessages(userId, type, sessionId) {
+  return (await fetchSessionMessagesPage(userId, type, sessionId)).messages;
 }
 
 export async function addMessage(userId, type, sessionId, message) {